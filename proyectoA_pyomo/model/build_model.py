@@ -1,35 +1,90 @@
 # -*- coding: utf-8 -*-
+from math import isinf
 from pathlib import Path
+from sys import intern
 import pandas as pd
 from pyomo.environ import (
-    ConcreteModel, Set, Param, Var, NonNegativeReals, Binary,
-    Objective, Constraint, minimize
+    ConcreteModel, Set, Param, Var, NonNegativeReals, Binary, Any,
+    Objective, Constraint, minimize, quicksum
 )
+from pyomo.core.expr import LinearExpression
+
+# Columnas que usa el modelo de cada CSV (con sus nombres alternativos) y su
+# tipo: read_csv lee sólo esas columnas y no infiere tipos. Los ids de
+# arcs_cache (pocos valores repetidos en muchas filas) van como categoría:
+# códigos enteros en vez de un str por fila
+_STR, _F64, _CAT = str, "float64", "category"
+CENTERS_DTYPES = {"id": _STR, "cap": _F64, "capacity": _F64}
+CLIENTS_DTYPES = {"id": _STR, "q": _F64, "demand": _F64}
+VEHICLES_DTYPES = {
+    "id": _STR, "Q": _F64, "capacity": _F64, "Capacity": _F64,
+    "fixed_cost": _F64, "rango_util_km": _F64, "jornada_max_h": _F64,
+}
+ARCS_DTYPES = {
+    "vehicle": _CAT, "from": _CAT, "to": _CAT,
+    "veh": _CAT, "i": _CAT, "j": _CAT,
+    "dist_km": _F64, "time_h": _F64, "cost": _F64,
+}
+ACCESS_DTYPES = {"node": _STR, "vehicle": _STR, "allowed": _F64}
+
+def _read_csv_typed(path, dtypes):
+    """read_csv restringido a las columnas de `dtypes` y con esos tipos."""
+    return pd.read_csv(path, usecols=lambda c: c in dtypes, dtype=dtypes)
+
+def _read_parquet_typed(path, dtypes):
+    """read_parquet con las columnas de `dtypes` presentes en el archivo."""
+    df = pd.read_parquet(path)
+    keep = [c for c in df.columns if c in dtypes]
+    return df[keep].astype({c: dtypes[c] for c in keep})
+
+def _parquet_first(csv_path):
+    """
+    [csv_path con sufijo .parquet, csv_path]; el .parquet sólo se incluye si
+    existe y no es más viejo que el CSV (preprocess escribe ambos).
+    """
+    pq = csv_path.with_suffix(".parquet")
+    if pq.exists() and (not csv_path.exists()
+                        or pq.stat().st_mtime >= csv_path.stat().st_mtime):
+        return [pq, csv_path]
+    return [csv_path]
 
-def _read_first_existing(path_candidates):
+def _read_first_existing(path_candidates, dtypes=None):
     """
-    Devuelve el primer CSV existente en la lista de paths.
+    Devuelve el primer CSV (o Parquet) existente en la lista de paths.
+    Si se da `dtypes`, sólo lee esas columnas con esos tipos.
     Lanza FileNotFoundError si ninguno existe.
     """
     for p in path_candidates:
         if p.exists():
-            return pd.read_csv(p)
+            if p.suffix == ".parquet":
+                return pd.read_parquet(p) if dtypes is None else _read_parquet_typed(p, dtypes)
+            if dtypes is None:
+                return pd.read_csv(p)
+            return _read_csv_typed(p, dtypes)
     raise FileNotFoundError(f"Ninguno de los archivos existe: {path_candidates}")
 
-def build_model(data_dir: str):
+def _is_str_ids(col):
+    """True si la columna ya tiene ids str (str, o categoría de str)."""
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        return pd.api.types.is_string_dtype(col.cat.categories)
+    return pd.api.types.is_string_dtype(col)
+
+def _as_str(df, cols):
     """
-    Construye el modelo Pyomo de LogistiCo.
+    Devuelve df con las columnas de id en str. Si ya lo son (lectura tipada,
+    también como categoría de str) no copia nada; sólo convierte, p.ej.,
+    frames externos con ids numéricos.
+    """
+    to_cast = {c: str for c in cols
+               if c in df.columns and not _is_str_ids(df[c])}
+    return df.astype(to_cast) if to_cast else df
 
-    Diseñado para:
-    - Caso Base (Proyecto_A_Caso1) usando inputs/ generados por preprocess.py
-    - Proyecto A Caso 2, siempre que preprocess.py también genere inputs/ coherentes.
+def _read_inputs(data_dir):
+    """
+    Lee los CSV del modelo desde data_dir (paso 1).
 
-    Supone que preprocess.py ya escribió:
-      inputs/nodes_centers.csv
-      inputs/nodes_clients.csv
-      inputs/vehicles.csv
-      outputs/tables/arcs_cache.csv
-    (y opcionalmente algún access.csv / access_matrix.csv)
+    Devuelve (centers, clients, vehicles, arcs_cache, access); access es None
+    si no hay archivo de acceso.
     """
     root = Path(data_dir)
 
@@ -39,23 +94,25 @@ def build_model(data_dir: str):
     centers = _read_first_existing([
         root / "inputs" / "nodes_centers.csv",
         root / "data" / "raw" / "nodes_centers.csv",
-    ])
+    ], CENTERS_DTYPES)
 
     clients = _read_first_existing([
         root / "inputs" / "nodes_clients.csv",
         root / "data" / "raw" / "nodes_clients.csv",
-    ])
+    ], CLIENTS_DTYPES)
 
     vehicles = _read_first_existing([
         root / "inputs" / "vehicles.csv",
         root / "data" / "params" / "vehicles.csv",
-    ])
+    ], VEHICLES_DTYPES)
 
-    # arcs_cache: preferimos el espejo en outputs/tables (coherente con solve.py)
-    arcs_cache = _read_first_existing([
-        root / "outputs" / "tables" / "arcs_cache.csv",
-        root / "inputs" / "arcs_cache.csv",
-    ])
+    # arcs_cache: preferimos el espejo en outputs/tables (coherente con solve.py),
+    # y en cada carpeta la copia Parquet si está al día
+    arcs_cache = _read_first_existing(
+        _parquet_first(root / "outputs" / "tables" / "arcs_cache.csv")
+        + _parquet_first(root / "inputs" / "arcs_cache.csv"),
+        ARCS_DTYPES,
+    )
 
     # access es opcional (para Caso Base no existe)
     access = None
@@ -65,17 +122,25 @@ def build_model(data_dir: str):
         root / "inputs" / "access.csv",
     ]:
         if p.exists():
-            access = pd.read_csv(p)
+            access = _read_csv_typed(p, ACCESS_DTYPES)
             break
 
-    # Normalizar tipos de id a string
-    centers["id"] = centers["id"].astype(str)
-    clients["id"] = clients["id"].astype(str)
-    vehicles["id"] = vehicles["id"].astype(str)
+    return centers, clients, vehicles, arcs_cache, access
+
+def _normalize_inputs(centers, clients, vehicles, arcs_cache):
+    """
+    Normaliza columnas clave (pasos 2-3).
 
+    Devuelve (centers, clients, vehicles, arcs_cache, demand_col, cap_col)
+    con ids como str, vehicles indexado por id y arcs_cache con columnas
+    'vehicle','from','to'.
+    """
     # ---------------------------
     # 2. Normalizar columnas clave
     # ---------------------------
+    centers = _as_str(centers, ["id"])
+    clients = _as_str(clients, ["id"])
+
     # demanda: q o demand
     if "q" in clients.columns:
         demand_col = "q"
@@ -98,7 +163,7 @@ def build_model(data_dir: str):
         )
 
     # vehículos: aseguramos las columnas que usa el modelo
-    vehicles = vehicles.set_index("id").copy()
+    vehicles = _as_str(vehicles, ["id"]).set_index("id")
 
     # Q (capacidad de vehículo)
     if "Q" not in vehicles.columns:
@@ -109,13 +174,15 @@ def build_model(data_dir: str):
         else:
             raise KeyError("vehicles.csv debe tener 'Q' o alguna columna de capacidad ('capacity').")
 
-    # fixed_cost, rango, jornada: si no existen, dar valores seguros
+    # fixed_cost, rango, jornada: si no existen, dar valores seguros. Sin
+    # rango/jornada el límite es infinito y Range/Jornada no se generan para
+    # ese vehículo (en vez de un big-M de 1e6 como coeficiente de u)
     if "fixed_cost" not in vehicles.columns:
         vehicles["fixed_cost"] = 0.0
     if "rango_util_km" not in vehicles.columns:
-        vehicles["rango_util_km"] = 1e6  # rango prácticamente ilimitado si no se especifica
+        vehicles["rango_util_km"] = float("inf")
     if "jornada_max_h" not in vehicles.columns:
-        vehicles["jornada_max_h"] = 1e6  # jornada muy grande si no se especifica
+        vehicles["jornada_max_h"] = float("inf")
 
     # ---------------------------
     # 3. Normalizar arcs_cache ('veh','i','j' -> 'vehicle','from','to')
@@ -134,96 +201,244 @@ def build_model(data_dir: str):
         raise KeyError(
             f"arcs_cache.csv debe contener columnas {required_arc_cols}, faltan: {missing}"
         )
+    arcs_cache = _as_str(arcs_cache, ["vehicle", "from", "to"])
+
+    # Dominio de dist/tiempo/costo validado una sola vez sobre las columnas
+    # (los Param por arco no repiten el chequeo elemento a elemento)
+    arc_vals = arcs_cache[["dist_km", "time_h", "cost"]]
+    bad = arc_vals.isna() | (arc_vals < 0)
+    if bad.to_numpy().any():
+        raise ValueError(
+            "arcs_cache.csv tiene dist_km/time_h/cost negativos o vacíos en "
+            f"{int(bad.any(axis=1).sum())} filas"
+        )
+
+    return centers, clients, vehicles, arcs_cache, demand_col, cap_col
+
+def _prune_arcs(arcs_cache, centers, vehicles, access=None, prune_limits=True):
+    """
+    Quita de arcs_cache (ya normalizado) los arcos que no pueden estar en
+    ninguna solución factible, antes de crear variables:
+      - dist_km > rango_util_km o time_h > jornada_max_h del vehículo
+        (Range/Jornada se violarían con ese arco solo; sólo si prune_limits),
+      - centro -> centro (la ruta tocaría dos CD; AssignOneCenter lo impide),
+      - algún extremo no accesible para el vehículo (access.allowed < 1;
+        sin dato para el par, se considera permitido).
+    """
+    keep = ~(arcs_cache["from"].isin(centers["id"]) & arcs_cache["to"].isin(centers["id"]))
+    if prune_limits:
+        rango = arcs_cache["vehicle"].map(vehicles["rango_util_km"]).astype(float)
+        jornada = arcs_cache["vehicle"].map(vehicles["jornada_max_h"]).astype(float)
+        keep &= ~(arcs_cache["dist_km"] > rango) & ~(arcs_cache["time_h"] > jornada)
+
+    if access is not None and {"node", "vehicle", "allowed"} <= set(access.columns):
+        access = _as_str(access, ["node", "vehicle"]) \
+            .drop_duplicates(["node", "vehicle"], keep="last")
+        denied = pd.MultiIndex.from_frame(
+            access.loc[access["allowed"] < 1.0, ["node", "vehicle"]]
+        )
+        for end in ("from", "to"):
+            keep &= ~pd.MultiIndex.from_arrays(
+                [arcs_cache[end], arcs_cache["vehicle"]]
+            ).isin(denied)
+
+    return arcs_cache[keep.to_numpy()]
+
+def _check_clients_reachable(arcs_cache, clients):
+    """
+    Tras la poda, cada cliente necesita al menos un arco de entrada y uno de
+    salida (VisitIn/VisitOut); si no, el modelo es infactible por construcción.
+    """
+    ids = clients["id"]
+    orphan = ids[~(ids.isin(arcs_cache["to"]) & ids.isin(arcs_cache["from"]))]
+    if not orphan.empty:
+        raise ValueError(
+            "Clientes sin arcos factibles tras podar rango/jornada/acceso "
+            f"(ningún vehículo puede visitarlos): {orphan.tolist()}"
+        )
+
+def _symmetric_vehicle_pairs(vehicles, arcs_cache):
+    """
+    Pares consecutivos (a, b) de vehículos intercambiables: mismos Q,
+    fixed_cost, rango y jornada, y mismos arcos (ya podados, así que también
+    igual acceso) con iguales dist/tiempo/costo. Para cada par, u_a >= u_b
+    elimina las soluciones que sólo permutan esos vehículos.
+    """
+    # Firma de los arcos de cada vehículo: suma (independiente del orden) de
+    # los hash por fila, más la cantidad de arcos
+    row_hash = pd.util.hash_pandas_object(
+        arcs_cache[["from", "to", "dist_km", "time_h", "cost"]], index=False
+    )
+    sig = row_hash.groupby(arcs_cache["vehicle"].to_numpy()).agg(["sum", "size"])
+    key = vehicles[["Q", "fixed_cost", "rango_util_km", "jornada_max_h"]].join(sig)
+
+    pairs = []
+    for _, group in key.groupby(list(key.columns), sort=False, dropna=False):
+        ids = group.index.tolist()
+        pairs.extend(zip(ids, ids[1:]))
+    return pairs
+
+def _load_inputs(data_dir):
+    """
+    Lee, normaliza y poda los insumos del modelo (pasos 1-3).
 
-    arcs_cache["vehicle"] = arcs_cache["vehicle"].astype(str)
-    arcs_cache["from"] = arcs_cache["from"].astype(str)
-    arcs_cache["to"] = arcs_cache["to"].astype(str)
+    Devuelve (centers, clients, vehicles, arcs_cache, access, demand_col, cap_col).
+    Lo usan build_model_fast y build_model_linopy.
+    """
+    centers, clients, vehicles, arcs_cache, access = _read_inputs(data_dir)
+    centers, clients, vehicles, arcs_cache, demand_col, cap_col = \
+        _normalize_inputs(centers, clients, vehicles, arcs_cache)
+    arcs_cache = _prune_arcs(arcs_cache, centers, vehicles, access)
+    _check_clients_reachable(arcs_cache, clients)
+    return centers, clients, vehicles, arcs_cache, access, demand_col, cap_col
+
+def build_model(data_dir: str):
+    """
+    Construye el modelo Pyomo de LogistiCo.
+
+    Diseñado para:
+    - Caso Base (Proyecto_A_Caso1) usando inputs/ generados por preprocess.py
+    - Proyecto A Caso 2, siempre que preprocess.py también genere inputs/ coherentes.
+
+    Supone que preprocess.py ya escribió:
+      inputs/nodes_centers.csv
+      inputs/nodes_clients.csv
+      inputs/vehicles.csv
+      outputs/tables/arcs_cache.csv
+    (y opcionalmente algún access.csv / access_matrix.csv)
+    """
+    return build_model_core(*_read_inputs(data_dir))
+
+def build_model_core(centers, clients, vehicles, arcs_cache, access=None,
+                     prune_limits=True, symmetry=True):
+    """
+    Construye el modelo Pyomo a partir de DataFrames ya cargados.
+
+    Mismo contrato de columnas que los CSV de build_model (ids, 'q'/'demand',
+    'cap'/'capacity', 'Q', arcs_cache con 'vehicle','from','to' o
+    'veh','i','j'); access es opcional (columnas node, vehicle, allowed).
+
+    prune_limits=False conserva los arcos que violan rango/jornada por sí
+    solos (para poder desactivar Range/Jornada después); symmetry=False omite
+    SymU, cuyos pares sólo son válidos si los arcos ya vienen podados por
+    acceso (no así si el acceso se impone luego fijando variables).
+    """
+    centers, clients, vehicles, arcs_cache, demand_col, cap_col = \
+        _normalize_inputs(centers, clients, vehicles, arcs_cache)
+    # Arcos infactibles (rango/jornada, centro->centro, acceso) fuera de KA
+    arcs_cache = _prune_arcs(arcs_cache, centers, vehicles, access, prune_limits)
+    _check_clients_reachable(arcs_cache, clients)
 
     # ---------------------------
     # 4. Construir modelo Pyomo
     # ---------------------------
     m = ConcreteModel(name="LogistiCo_CVRP")
 
-    # Conjuntos
-    m.C = Set(initialize=centers["id"].tolist(), ordered=False)
-    m.I = Set(initialize=clients["id"].tolist(), ordered=False)
-    m.N = Set(initialize=list(centers["id"]) + list(clients["id"]), ordered=False)
-    m.K = Set(initialize=vehicles.index.tolist(), ordered=False)
-
-    # Todos los arcos i != j sobre N
-    A_list = [(i, j) for i in m.N.value for j in m.N.value if i != j]
-    m.A = Set(dimen=2, initialize=A_list, ordered=False)
+    # Conjuntos (ids internados: conjuntos y claves (k,i,j) comparten los
+    # mismos objetos str, y los lookups en los dicts por arco comparan por
+    # identidad antes que carácter a carácter)
+    C_ids = [intern(c) for c in centers["id"]]
+    I_ids = [intern(i) for i in clients["id"]]
+    K_ids = [intern(k) for k in vehicles.index]
+    N_ids = C_ids + I_ids
+    m.C = Set(initialize=C_ids, ordered=False)
+    m.I = Set(initialize=I_ids, ordered=False)
+    m.N = Set(initialize=N_ids, ordered=False)
+    m.K = Set(initialize=K_ids, ordered=False)
+
+    # Costos/tiempos/distancias por (k,i,j) desde arcs_cache (una sola pasada).
+    # Sólo se guardan los arcos válidos, así los diccionarios sirven tal cual
+    # de initialize para los Param sobre KA.
+    K_set, N_set = set(K_ids), set(N_ids)
+    cost_map, time_map, dist_map = {}, {}, {}
+    for k, i, j, d, t, c in arcs_cache[
+        ["vehicle", "from", "to", "dist_km", "time_h", "cost"]
+    ].itertuples(index=False, name=None):
+        if i == j or k not in K_set or i not in N_set or j not in N_set:
+            continue
+        key = (intern(k), intern(i), intern(j))
+        cost_map[key] = float(c)
+        time_map[key] = float(t)
+        dist_map[key] = float(d)
+
+    # Arcos (k,i,j) realmente presentes en arcs_cache: x, y y los parámetros
+    # por arco sólo existen sobre este conjunto disperso (no sobre K x A)
+    KA_list = list(cost_map)
+    m.KA = Set(dimen=3, initialize=KA_list, ordered=False)
 
     # ---------------------------
     # 5. Parámetros
     # ---------------------------
     # Demanda y capacidad de centros
-    q_map = clients.set_index("id")[demand_col].to_dict()
-    cap_c_map = centers.set_index("id")[cap_col].to_dict()
+    # (dict(zip(...)) directo sobre las columnas, sin armar un índice nuevo)
+    q_map = dict(zip(I_ids, clients[demand_col].tolist()))
+    cap_c_map = dict(zip(C_ids, centers[cap_col].tolist()))
     m.q = Param(m.I, initialize=q_map, within=NonNegativeReals, default=0.0)
     m.cap_c = Param(m.C, initialize=cap_c_map, within=NonNegativeReals, default=0.0)
 
     # Parámetros de vehículos
-    Q_map = vehicles["Q"].to_dict()
-    f_map = vehicles["fixed_cost"].to_dict()
-    rango_map = vehicles["rango_util_km"].to_dict()
-    jornada_map = vehicles["jornada_max_h"].to_dict()
+    Q_map = dict(zip(K_ids, vehicles["Q"].tolist()))
+    f_map = dict(zip(K_ids, vehicles["fixed_cost"].tolist()))
+    rango_map = dict(zip(K_ids, vehicles["rango_util_km"].tolist()))
+    jornada_map = dict(zip(K_ids, vehicles["jornada_max_h"].tolist()))
     m.Q = Param(m.K, initialize=Q_map, within=NonNegativeReals, default=0.0)
     m.f = Param(m.K, initialize=f_map, within=NonNegativeReals, default=0.0)
     m.rango = Param(m.K, initialize=rango_map, within=NonNegativeReals, default=0.0)
     m.jornada = Param(m.K, initialize=jornada_map, within=NonNegativeReals, default=0.0)
 
-    # Acceso urbano A_{i,k} (si no hay archivo, todo permitido = 1)
-    access_idx = {}
-    if access is not None and {"node", "vehicle", "allowed"} <= set(access.columns):
-        access["node"] = access["node"].astype(str)
-        access["vehicle"] = access["vehicle"].astype(str)
-        access_idx = access.set_index(["node", "vehicle"])["allowed"].to_dict()
-
-    def A_init(m_, i, k):
-        # Si no hay info de acceso, o no hay par específico, por defecto 1
-        return float(access_idx.get((i, k), 1.0))
-
-    m.A_access = Param(m.N, m.K, initialize=A_init,
-                       within=NonNegativeReals, default=1.0)
-
-    # Costos/tiempos/distancias por (k,i,j) desde arcs_cache
-    arcs_cache["key"] = list(zip(
-        arcs_cache["vehicle"], arcs_cache["from"], arcs_cache["to"]
-    ))
-    cost_map = dict(zip(arcs_cache["key"], arcs_cache["cost"]))
-    time_map = dict(zip(arcs_cache["key"], arcs_cache["time_h"]))
-    dist_map = dict(zip(arcs_cache["key"], arcs_cache["dist_km"]))
-
-    def cost_init(m_, k, i, j):
-        return float(cost_map.get((k, i, j), 1e9))
-
-    def time_init(m_, k, i, j):
-        return float(time_map.get((k, i, j), 1e6))
-
-    def dist_init(m_, k, i, j):
-        return float(dist_map.get((k, i, j), 1e6))
-
-    m.cost = Param(m.K, m.A, initialize=cost_init, within=NonNegativeReals)
-    m.time = Param(m.K, m.A, initialize=time_init, within=NonNegativeReals)
-    m.dist = Param(m.K, m.A, initialize=dist_init, within=NonNegativeReals)
+    # Parámetros por arco: ingestión directa de los dicts; el dominio ya se
+    # validó sobre arcs_cache en _normalize_inputs (within=Any evita el
+    # chequeo por elemento)
+    m.cost = Param(m.KA, initialize=cost_map, within=Any)
+    m.time = Param(m.KA, initialize=time_map, within=Any)
+    m.dist = Param(m.KA, initialize=dist_map, within=Any)
 
     # ---------------------------
     # 6. Variables
     # ---------------------------
-    m.x = Var(m.K, m.A, domain=Binary)
-    m.y = Var(m.K, m.A, domain=NonNegativeReals)
+    m.x = Var(m.KA, domain=Binary)
+    m.y = Var(m.KA, domain=NonNegativeReals,
+              bounds=lambda m_, k, i, j: (0.0, Q_map[k]))
     m.z = Var(m.C, m.K, domain=Binary)
     m.s = Var(m.C, domain=NonNegativeReals)
     m.u = Var(m.K, domain=Binary)
 
+    # Adyacencia por vehículo y nodo con los propios objetos variable (una
+    # sola pasada sobre m.x / m.y, que recorren KA en el mismo orden): las
+    # reglas suman directamente estas listas, sin recorrer KA en cada índice
+    # ni indexar m.x[k,i,j] / m.y[k,i,j] término a término.
+    # x_k / dist_k / time_k: variables x de k y sus coeficientes, ya listos
+    # para las expresiones lineales de Range/Jornada.
+    x_k = {k: [] for k in K_ids}
+    dist_k = {k: [] for k in K_ids}
+    time_k = {k: [] for k in K_ids}
+    x_out = {k: {i: [] for i in N_ids} for k in K_ids}
+    x_in = {k: {i: [] for i in N_ids} for k in K_ids}
+    y_out = {k: {i: [] for i in N_ids} for k in K_ids}
+    y_in = {k: {i: [] for i in N_ids} for k in K_ids}
+    obj_coefs, obj_vars = [], []
+    for ((k, i, j), xv), yv in zip(m.x.items(), m.y.values()):
+        x_k[k].append(xv)
+        dist_k[k].append(dist_map[k, i, j])
+        time_k[k].append(time_map[k, i, j])
+        x_out[k][i].append(xv)
+        x_in[k][j].append(xv)
+        y_out[k][i].append(yv)
+        y_in[k][j].append(yv)
+        obj_coefs.append(cost_map[k, i, j])
+        obj_vars.append(xv)
+
     # ---------------------------
     # 7. Función objetivo
     # ---------------------------
+    # Expresión lineal armada directamente (coeficientes + variables), sin
+    # pasar por la suma término a término de Pyomo
     def obj_rule(m_):
-        return sum(m_.cost[k, i, j] * m_.x[k, (i, j)]
-                   for k in m_.K for (i, j) in m_.A) + \
-               sum(m_.f[k] * m_.u[k] for k in m_.K)
+        return LinearExpression(
+            constant=0.0,
+            linear_coefs=obj_coefs + [f_map[k] for k in K_ids],
+            linear_vars=obj_vars + [m_.u[k] for k in K_ids],
+        )
 
     m.OBJ = Objective(rule=obj_rule, sense=minimize)
 
@@ -233,60 +448,81 @@ def build_model(data_dir: str):
 
     # Visita única por cliente
     def visit_in_rule(m_, i):
-        return sum(m_.x[k, (j, i)] for k in m_.K for (j, ii) in m_.A if ii == i) == 1
+        return quicksum(xv for k in K_ids for xv in x_in[k][i]) == 1
 
     def visit_out_rule(m_, i):
-        return sum(m_.x[k, (i, j)] for k in m_.K for (ii, j) in m_.A if ii == i) == 1
+        return quicksum(xv for k in K_ids for xv in x_out[k][i]) == 1
 
     m.VisitIn = Constraint(m.I, rule=visit_in_rule)
     m.VisitOut = Constraint(m.I, rule=visit_out_rule)
 
     # Continuidad por vehículo en cada cliente
     def cont_rule(m_, k, i):
+        # Sin arcos de k en i (podados): la restricción es trivial
+        if not x_out[k][i] and not x_in[k][i]:
+            return Constraint.Skip
         return (
-            sum(m_.x[k, (i, j)] for (ii, j) in m_.A if ii == i) -
-            sum(m_.x[k, (j, i)] for (j, ii) in m_.A if ii == i)
+            quicksum(x_out[k][i]) -
+            quicksum(x_in[k][i])
         ) == 0
 
     m.Continuity = Constraint(m.K, m.I, rule=cont_rule)
 
     # Salida/regreso al mismo CD por vehículo
     def start_center_rule(m_, k, c):
-        return sum(m_.x[k, (c, j)] for (cc, j) in m_.A if cc == c) == m_.z[c, k]
+        return quicksum(x_out[k][c]) == m_.z[c, k]
 
     def end_center_rule(m_, k, c):
-        return sum(m_.x[k, (i, c)] for (i, cc) in m_.A if cc == c) == m_.z[c, k]
+        return quicksum(x_in[k][c]) == m_.z[c, k]
 
     m.StartAtCenter = Constraint(m.K, m.C, rule=start_center_rule)
     m.EndAtCenter = Constraint(m.K, m.C, rule=end_center_rule)
 
     # Cada vehículo a lo sumo un CD; u_k = sum_c z_{ck}
     def one_center_rule(m_, k):
-        return sum(m_.z[c, k] for c in m_.C) == m_.u[k]
+        return quicksum(m_.z[c, k] for c in m_.C) == m_.u[k]
 
     m.AssignOneCenter = Constraint(m.K, rule=one_center_rule)
 
+    # Ruptura de simetría entre vehículos intercambiables: u_a >= u_b
+    def sym_rule(m_, a, b):
+        return m_.u[a] >= m_.u[b]
+
+    pairs = _symmetric_vehicle_pairs(vehicles, arcs_cache) if symmetry else []
+    m.SymU = Constraint(pairs, rule=sym_rule)
+
     # Capacidad por arco (y <= Q * x)
     def cap_arc_rule(m_, k, i, j):
-        return m_.y[k, (i, j)] <= m_.Q[k] * m_.x[k, (i, j)]
+        return LinearExpression(
+            constant=0.0,
+            linear_coefs=[1.0, -Q_map[k]],
+            linear_vars=[m_.y[k, i, j], m_.x[k, i, j]],
+        ) <= 0
 
-    m.CapArc = Constraint(m.K, m.A, rule=cap_arc_rule)
+    m.CapArc = Constraint(m.KA, rule=cap_arc_rule)
 
-    # Conservación de flujo en clientes (agregado sobre k)
+    # Conservación de flujo en clientes (agregado sobre k):
+    # sum y_in - sum y_out - q_i == 0 como una sola expresión lineal
     def cons_client_rule(m_, i):
-        return (
-            sum(m_.y[k, (j, i)] for k in m_.K for (j, ii) in m_.A if ii == i) -
-            sum(m_.y[k, (i, j)] for k in m_.K for (ii, j) in m_.A if ii == i)
-        ) == m_.q[i]
+        y_i_in = [yv for k in K_ids for yv in y_in[k][i]]
+        y_i_out = [yv for k in K_ids for yv in y_out[k][i]]
+        return LinearExpression(
+            constant=-q_map[i],
+            linear_coefs=[1.0] * len(y_i_in) + [-1.0] * len(y_i_out),
+            linear_vars=y_i_in + y_i_out,
+        ) == 0
 
     m.FlowClients = Constraint(m.I, rule=cons_client_rule)
 
     # Balance en centros y capacidad de centro
     def cons_center_rule(m_, c):
-        return (
-            sum(m_.y[k, (c, j)] for k in m_.K for (cc, j) in m_.A if cc == c) -
-            sum(m_.y[k, (j, c)] for k in m_.K for (j, cc) in m_.A if cc == c)
-        ) == m_.s[c]
+        y_c_out = [yv for k in K_ids for yv in y_out[k][c]]
+        y_c_in = [yv for k in K_ids for yv in y_in[k][c]]
+        return LinearExpression(
+            constant=0.0,
+            linear_coefs=[1.0] * len(y_c_out) + [-1.0] * len(y_c_in) + [-1.0],
+            linear_vars=y_c_out + y_c_in + [m_.s[c]],
+        ) == 0
 
     m.FlowCenters = Constraint(m.C, rule=cons_center_rule)
 
@@ -295,33 +531,34 @@ def build_model(data_dir: str):
 
     m.CenterCap = Constraint(m.C, rule=cap_center_rule)
 
-    # Acceso urbano (extremos del arco deben ser permitidos)
-    def access_i_rule(m_, k, i, j):
-        return m_.x[k, (i, j)] <= m_.A_access[i, k]
-
-    def access_j_rule(m_, k, i, j):
-        return m_.x[k, (i, j)] <= m_.A_access[j, k]
-
-    m.AccessI = Constraint(m.K, m.A, rule=access_i_rule)
-    m.AccessJ = Constraint(m.K, m.A, rule=access_j_rule)
-
-    # Rango útil (km) por vehículo
+    # Rango útil (km) por vehículo: sum d*x - rango*u <= 0, como una sola
+    # expresión lineal por k (igual que el objetivo)
     def range_rule(m_, k):
-        return sum(m_.dist[k, (i, j)] * m_.x[k, (i, j)] for (i, j) in m_.A) <= \
-               m_.rango[k] * m_.u[k]
+        if isinf(rango_map[k]):
+            return Constraint.Skip
+        return LinearExpression(
+            constant=0.0,
+            linear_coefs=dist_k[k] + [-rango_map[k]],
+            linear_vars=x_k[k] + [m_.u[k]],
+        ) <= 0
 
     m.Range = Constraint(m.K, rule=range_rule)
 
     # Jornada máxima (horas) por vehículo
     def jornada_rule(m_, k):
-        return sum(m_.time[k, (i, j)] * m_.x[k, (i, j)] for (i, j) in m_.A) <= \
-               m_.jornada[k] * m_.u[k]
+        if isinf(jornada_map[k]):
+            return Constraint.Skip
+        return LinearExpression(
+            constant=0.0,
+            linear_coefs=time_k[k] + [-jornada_map[k]],
+            linear_vars=x_k[k] + [m_.u[k]],
+        ) <= 0
 
     m.Jornada = Constraint(m.K, rule=jornada_rule)
 
     # Suficiencia de oferta total
     def supply_cover_rule(m_):
-        return sum(m_.s[c] for c in m_.C) == sum(m_.q[i] for i in m_.I)
+        return quicksum(m_.s[c] for c in m_.C) == quicksum(m_.q[i] for i in m_.I)
 
     m.SupplyCover = Constraint(rule=supply_cover_rule)
 
@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+"""
+Formulación matricial del CVRP de LogistiCo directamente sobre HiGHS.
+
+Misma formulación que model/build_model.py, pero la matriz de restricciones
+se arma vectorizada con numpy desde arcs_cache (formato por columnas) y se
+pasa de una sola vez a la API de HiGHS, sin crear objetos Constraint de
+Pyomo por índice. Pensada para las instancias grandes, donde la generación
+del modelo Pyomo domina el tiempo total.
+
+Orden de columnas: x (|KA|), y (|KA|), z (|C|·|K|, c mayor), s (|C|), u (|K|).
+"""
+import numpy as np
+import pandas as pd
+
+from model.build_model import _load_inputs, _symmetric_vehicle_pairs
+
+
+def _codes(values, categories):
+    """Códigos enteros de `values` según el orden de `categories` (-1 si no está)."""
+    return pd.Categorical(values, categories=categories).codes.astype(np.int64)
+
+
+def assemble_matrix(data_dir: str):
+    """
+    Arma el MILP de LogistiCo en arreglos numpy, sin depender del solver.
+
+    Devuelve (mat, layout). mat tiene col_cost, col_lower, col_upper,
+    integrality (1 = entera), row_lower, row_upper y la matriz en CSC
+    (start, index, value) con n_col columnas y n_row filas. layout guarda
+    los conjuntos, el DataFrame de arcos (una fila por (k,i,j) en el mismo
+    orden que las columnas x/y) y los desplazamientos de cada bloque de
+    variables, para leer la solución con values_from_columns.
+    """
+    # arcs_cache ya viene podado (rango/jornada, centro->centro, acceso)
+    centers, clients, vehicles, arcs_cache, _, demand_col, cap_col = \
+        _load_inputs(data_dir)
+
+    C_ids = list(centers["id"])
+    I_ids = list(clients["id"])
+    K_ids = list(vehicles.index)
+    N_ids = C_ids + I_ids
+    nC, nI, nK = len(C_ids), len(I_ids), len(K_ids)
+
+    # ---------------------------
+    # Arcos válidos (KA)
+    # ---------------------------
+    # (filtro sobre códigos: los ids pueden venir como categorías distintas)
+    arcs = arcs_cache[["vehicle", "from", "to", "dist_km", "time_h", "cost"]]
+    ai = _codes(arcs["from"], N_ids)
+    aj = _codes(arcs["to"], N_ids)
+    arcs = arcs[
+        (_codes(arcs["vehicle"], K_ids) >= 0) & (ai >= 0) & (aj >= 0) & (ai != aj)
+    ].drop_duplicates(["vehicle", "from", "to"], keep="last").reset_index(drop=True)
+    nA = len(arcs)
+
+    ak = _codes(arcs["vehicle"], K_ids)
+    ai = _codes(arcs["from"], N_ids)   # < nC -> centro, >= nC -> cliente
+    aj = _codes(arcs["to"], N_ids)
+    cost = arcs["cost"].to_numpy(dtype=float)
+    dist = arcs["dist_km"].to_numpy(dtype=float)
+    time = arcs["time_h"].to_numpy(dtype=float)
+
+    # Parámetros por vehículo, centro y cliente (alineados con K_ids, C_ids, I_ids)
+    Q = vehicles["Q"].to_numpy(dtype=float)
+    f = vehicles["fixed_cost"].to_numpy(dtype=float)
+    rango = vehicles["rango_util_km"].to_numpy(dtype=float)
+    jornada = vehicles["jornada_max_h"].to_numpy(dtype=float)
+    q = clients[demand_col].to_numpy(dtype=float)
+    cap_c = centers[cap_col].to_numpy(dtype=float)
+
+    # ---------------------------
+    # Variables
+    # ---------------------------
+    ox, oy = 0, nA
+    oz = 2 * nA
+    os_ = oz + nC * nK
+    ou = os_ + nC
+    n_col = ou + nK
+
+    def zcol(c, k):
+        return oz + c * nK + k
+
+    col_cost = np.zeros(n_col)
+    col_cost[ox:ox + nA] = cost
+    col_cost[ou:ou + nK] = f
+
+    col_lower = np.zeros(n_col)
+    col_upper = np.ones(n_col)
+    col_upper[oy:oy + nA] = Q[ak]
+    col_upper[os_:os_ + nC] = cap_c          # CenterCap como cota de s
+
+    integrality = np.zeros(n_col, dtype=np.int32)
+    integrality[ox:ox + nA] = 1
+    integrality[oz:os_] = 1
+    integrality[ou:ou + nK] = 1
+
+    # ---------------------------
+    # Restricciones (tripletas fila, columna, coeficiente)
+    # ---------------------------
+    rows, cols, vals, lo, up = [], [], [], [], []
+    n_row = 0
+
+    def block(r, c, v, lower, upper):
+        """Agrega un bloque de filas; r es relativo al bloque."""
+        nonlocal n_row
+        rows.append(np.asarray(r, dtype=np.int64) + n_row)
+        cols.append(np.asarray(c, dtype=np.int64))
+        vals.append(np.broadcast_to(np.asarray(v, dtype=float), np.shape(r)))
+        lo.append(np.asarray(lower, dtype=float))
+        up.append(np.asarray(upper, dtype=float))
+        n_row += len(lower)
+
+    arc = np.arange(nA)
+    to_cli, from_cli = aj >= nC, ai >= nC
+    to_cen, from_cen = ~to_cli, ~from_cli
+    ones_I = np.ones(nI)
+
+    # Visita única por cliente (entrada y salida)
+    block(aj[to_cli] - nC, ox + arc[to_cli], 1.0, ones_I, ones_I)
+    block(ai[from_cli] - nC, ox + arc[from_cli], 1.0, ones_I, ones_I)
+
+    # Continuidad por vehículo en cada cliente: fila k*nI + i
+    zeros_KI = np.zeros(nK * nI)
+    block(
+        np.concatenate([ak[from_cli] * nI + ai[from_cli] - nC,
+                        ak[to_cli] * nI + aj[to_cli] - nC]),
+        np.concatenate([ox + arc[from_cli], ox + arc[to_cli]]),
+        np.concatenate([np.ones(from_cli.sum()), -np.ones(to_cli.sum())]),
+        zeros_KI, zeros_KI,
+    )
+
+    # Salida/regreso al mismo CD: sum x - z_{ck} = 0, fila k*nC + c
+    kc = np.arange(nK * nC)
+    zc = zcol(kc % nC, kc // nC)
+    zeros_KC = np.zeros(nK * nC)
+    for sel, end in ((from_cen, ai), (to_cen, aj)):
+        block(
+            np.concatenate([ak[sel] * nC + end[sel], kc]),
+            np.concatenate([ox + arc[sel], zc]),
+            np.concatenate([np.ones(sel.sum()), -np.ones(nK * nC)]),
+            zeros_KC, zeros_KC,
+        )
+
+    # Cada vehículo a lo sumo un CD: sum_c z_{ck} - u_k = 0
+    kk = np.arange(nK)
+    block(
+        np.concatenate([kc // nC, kk]),
+        np.concatenate([zc, ou + kk]),
+        np.concatenate([np.ones(nK * nC), -np.ones(nK)]),
+        np.zeros(nK), np.zeros(nK),
+    )
+
+    # Ruptura de simetría entre vehículos intercambiables: u_a - u_b >= 0
+    pairs = _symmetric_vehicle_pairs(vehicles, arcs_cache)
+    if pairs:
+        pa, pb = (_codes(list(p), K_ids) for p in zip(*pairs))
+        rP = np.arange(len(pairs))
+        block(
+            np.concatenate([rP, rP]),
+            np.concatenate([ou + pa, ou + pb]),
+            np.concatenate([np.ones(len(pairs)), -np.ones(len(pairs))]),
+            np.zeros(len(pairs)), np.full(len(pairs), np.inf),
+        )
+
+    # Capacidad por arco: y - Q_k x <= 0
+    block(
+        np.concatenate([arc, arc]),
+        np.concatenate([oy + arc, ox + arc]),
+        np.concatenate([np.ones(nA), -Q[ak]]),
+        np.full(nA, -np.inf), np.zeros(nA),
+    )
+
+    # Conservación de flujo en clientes: entra - sale = q_i
+    block(
+        np.concatenate([aj[to_cli] - nC, ai[from_cli] - nC]),
+        np.concatenate([oy + arc[to_cli], oy + arc[from_cli]]),
+        np.concatenate([np.ones(to_cli.sum()), -np.ones(from_cli.sum())]),
+        q, q,
+    )
+
+    # Balance en centros: sale - entra - s_c = 0
+    cc = np.arange(nC)
+    block(
+        np.concatenate([ai[from_cen], aj[to_cen], cc]),
+        np.concatenate([oy + arc[from_cen], oy + arc[to_cen], os_ + cc]),
+        np.concatenate([np.ones(from_cen.sum()), -np.ones(to_cen.sum()),
+                        -np.ones(nC)]),
+        np.zeros(nC), np.zeros(nC),
+    )
+
+    # Rango útil y jornada máxima por vehículo (sin fila si el límite es inf)
+    for coef, lim in ((dist, rango), (time, jornada)):
+        has_lim = np.isfinite(lim)
+        row = np.cumsum(has_lim) - 1          # fila de cada vehículo con límite
+        sel = has_lim[ak]
+        block(
+            np.concatenate([row[ak[sel]], row[kk[has_lim]]]),
+            np.concatenate([ox + arc[sel], ou + kk[has_lim]]),
+            np.concatenate([coef[sel], -lim[has_lim]]),
+            np.full(has_lim.sum(), -np.inf), np.zeros(has_lim.sum()),
+        )
+
+    # Suficiencia de oferta total
+    total_q = np.array([q.sum()])
+    block(np.zeros(nC), os_ + cc, 1.0, total_q, total_q)
+
+    # ---------------------------
+    # Matriz por columnas (CSC)
+    # ---------------------------
+    rows = np.concatenate(rows)
+    cols = np.concatenate(cols)
+    vals = np.concatenate(vals)
+    order = np.lexsort((rows, cols))
+    start = np.zeros(n_col + 1, dtype=np.int32)
+    np.cumsum(np.bincount(cols, minlength=n_col), out=start[1:])
+
+    mat = {
+        "n_col": n_col, "n_row": n_row,
+        "col_cost": col_cost, "col_lower": col_lower, "col_upper": col_upper,
+        "integrality": integrality,
+        "row_lower": np.concatenate(lo), "row_upper": np.concatenate(up),
+        "start": start, "index": rows[order].astype(np.int32), "value": vals[order],
+    }
+    layout = {
+        "C": C_ids, "I": I_ids, "K": K_ids,
+        "arcs": arcs[["vehicle", "from", "to"]],
+        "x": ox, "y": oy, "z": oz, "s": os_, "u": ou,
+    }
+    return mat, layout
+
+
+def build_model_fast(data_dir: str):
+    """
+    Construye el MILP de LogistiCo como un highspy.Highs listo para run().
+
+    Devuelve (h, layout); ver assemble_matrix para el contenido de layout.
+    """
+    # highspy sólo hace falta aquí: assemble_matrix (y build_model_poi) no lo usan
+    import highspy
+
+    mat, layout = assemble_matrix(data_dir)
+
+    lp = highspy.HighsLp()
+    lp.num_col_ = mat["n_col"]
+    lp.num_row_ = mat["n_row"]
+    lp.col_cost_ = mat["col_cost"]
+    lp.col_lower_ = mat["col_lower"]
+    lp.col_upper_ = mat["col_upper"]
+    lp.row_lower_ = mat["row_lower"]
+    lp.row_upper_ = mat["row_upper"]
+    lp.a_matrix_.format_ = highspy.MatrixFormat.kColwise
+    lp.a_matrix_.start_ = mat["start"]
+    lp.a_matrix_.index_ = mat["index"]
+    lp.a_matrix_.value_ = mat["value"]
+    lp.integrality_ = [highspy.HighsVarType(int(t)) for t in mat["integrality"]]
+
+    h = highspy.Highs()
+    h.passModel(lp)
+    return h, layout
+
+
+def solution_values(h, layout):
+    """
+    Valores de la solución de `h` en el formato de dicts que usa
+    solve.export_solution: C, I, K, KA y x, y por (k,i,j); s por centro.
+    """
+    return values_from_columns(np.asarray(h.getSolution().col_value), layout)
+
+
+def values_from_columns(col, layout):
+    """Como solution_values, a partir del vector de columnas `col`."""
+    arcs = layout["arcs"]
+    nA, nC = len(arcs), len(layout["C"])
+    KA = list(arcs.itertuples(index=False, name=None))
+    return {
+        "C": list(layout["C"]),
+        "I": set(layout["I"]),
+        "K": list(layout["K"]),
+        "KA": KA,
+        "x": dict(zip(KA, col[layout["x"]:layout["x"] + nA].tolist())),
+        "y": dict(zip(KA, col[layout["y"]:layout["y"] + nA].tolist())),
+        "s": dict(zip(layout["C"], col[layout["s"]:layout["s"] + nC].tolist())),
+    }
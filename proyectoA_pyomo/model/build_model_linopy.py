@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+Formulación del CVRP de LogistiCo sobre linopy (xarray).
+
+Misma formulación que model/build_model.py, con variables densas
+x[K,i,j], y[K,i,j] enmascaradas a los arcos válidos de arcs_cache y
+restricciones agregadas con .sum(dim) en lugar de reglas por índice.
+Los arcos prohibidos por acceso urbano ya vienen podados de _load_inputs.
+Requiere linopy (opcional; ver solve.py, LINOPY=1).
+"""
+import numpy as np
+import pandas as pd
+import xarray as xr
+import linopy
+
+from model.build_model import _load_inputs, _symmetric_vehicle_pairs
+
+
+def _codes(values, categories):
+    """Códigos enteros de `values` según el orden de `categories` (-1 si no está)."""
+    return pd.Categorical(values, categories=categories).codes.astype(np.int64)
+
+
+def build_model_linopy(data_dir: str):
+    """
+    Construye el modelo linopy de LogistiCo.
+
+    Devuelve (m, layout): m es el linopy.Model, con variables x, y (dims
+    K, i, j), z (c, K), s (c) y u (K); layout guarda los ids de C, I y K.
+    """
+    # arcs_cache ya viene podado (rango/jornada, centro->centro, acceso)
+    centers, clients, vehicles, arcs_cache, _, demand_col, cap_col = \
+        _load_inputs(data_dir)
+
+    C_ids = list(centers["id"])
+    I_ids = list(clients["id"])
+    K_ids = list(vehicles.index)
+    N_ids = C_ids + I_ids
+    nN, nK = len(N_ids), len(K_ids)
+
+    # ---------------------------
+    # Parámetros por arco en grilla densa (K, i, j)
+    # ---------------------------
+    ak = _codes(arcs_cache["vehicle"], K_ids)
+    ai = _codes(arcs_cache["from"], N_ids)
+    aj = _codes(arcs_cache["to"], N_ids)
+    ok = (ak >= 0) & (ai >= 0) & (aj >= 0) & (ai != aj)
+    ak, ai, aj = ak[ok], ai[ok], aj[ok]
+
+    valid = np.zeros((nK, nN, nN), dtype=bool)
+    valid[ak, ai, aj] = True
+    grids = {}
+    for col in ("cost", "dist_km", "time_h"):
+        g = np.zeros((nK, nN, nN))
+        g[ak, ai, aj] = arcs_cache[col].to_numpy(dtype=float)[ok]
+        grids[col] = g
+
+    coords_kij = {"K": K_ids, "i": N_ids, "j": N_ids}
+    dims_kij = ("K", "i", "j")
+    arc_mask = xr.DataArray(valid, coords=coords_kij, dims=dims_kij)
+    cost = xr.DataArray(grids["cost"], coords=coords_kij, dims=dims_kij)
+    dist = xr.DataArray(grids["dist_km"], coords=coords_kij, dims=dims_kij)
+    time = xr.DataArray(grids["time_h"], coords=coords_kij, dims=dims_kij)
+
+    def _vec(series, dim, ids):
+        return xr.DataArray(series.to_numpy(dtype=float), coords={dim: ids}, dims=dim)
+
+    Q = _vec(vehicles["Q"], "K", K_ids)
+    f = _vec(vehicles["fixed_cost"], "K", K_ids)
+    rango = _vec(vehicles["rango_util_km"], "K", K_ids)
+    jornada = _vec(vehicles["jornada_max_h"], "K", K_ids)
+    q = _vec(clients[demand_col], "i", I_ids)
+    cap_c = _vec(centers[cap_col], "c", C_ids)
+
+    # ---------------------------
+    # Variables
+    # ---------------------------
+    m = linopy.Model()
+    x = m.add_variables(binary=True, coords=arc_mask.coords, mask=arc_mask, name="x")
+    y = m.add_variables(lower=0.0, upper=Q.broadcast_like(arc_mask),
+                        mask=arc_mask, name="y")
+    z = m.add_variables(binary=True, coords=[pd.Index(C_ids, name="c"),
+                                             pd.Index(K_ids, name="K")], name="z")
+    s = m.add_variables(lower=0.0, upper=cap_c, name="s")   # CenterCap como cota
+    u = m.add_variables(binary=True, coords=[pd.Index(K_ids, name="K")], name="u")
+
+    # Expresiones de x, y donde los huecos de la máscara aportan 0
+    xe, ye = x.fillna(0), y.fillna(0)
+
+    # ---------------------------
+    # Función objetivo
+    # ---------------------------
+    m.add_objective((cost * xe).sum() + (f * u).sum())
+
+    # ---------------------------
+    # Restricciones
+    # ---------------------------
+    x_out = xe.sum("j")                     # (K, i): arcos que salen de i
+    x_in = xe.sum("i").rename(j="i")        # (K, i): arcos que entran a i
+    y_out = ye.sum("j")
+    y_in = ye.sum("i").rename(j="i")
+
+    # Visita única por cliente
+    m.add_constraints(x_in.sum("K").sel(i=I_ids) == 1, name="VisitIn")
+    m.add_constraints(x_out.sum("K").sel(i=I_ids) == 1, name="VisitOut")
+
+    # Continuidad por vehículo en cada cliente
+    m.add_constraints((x_out - x_in).sel(i=I_ids) == 0, name="Continuity")
+
+    # Salida/regreso al mismo CD por vehículo
+    m.add_constraints(x_out.sel(i=C_ids).rename(i="c") - z == 0, name="StartAtCenter")
+    m.add_constraints(x_in.sel(i=C_ids).rename(i="c") - z == 0, name="EndAtCenter")
+
+    # Cada vehículo a lo sumo un CD; u_k = sum_c z_{ck}
+    m.add_constraints(z.sum("c") - u == 0, name="AssignOneCenter")
+
+    # Ruptura de simetría entre vehículos intercambiables: u_a - u_b >= 0
+    pairs = _symmetric_vehicle_pairs(vehicles, arcs_cache)
+    if pairs:
+        sym = np.zeros((len(pairs), nK))
+        for r, (a, b) in enumerate(pairs):
+            sym[r, K_ids.index(a)], sym[r, K_ids.index(b)] = 1.0, -1.0
+        sym = xr.DataArray(sym, coords={"pair": range(len(pairs)), "K": K_ids},
+                           dims=("pair", "K"))
+        m.add_constraints((sym * u).sum("K") >= 0, name="SymU")
+
+    # Capacidad por arco (y <= Q * x)
+    m.add_constraints(ye - Q * xe <= 0, name="CapArc", mask=arc_mask)
+
+    # Conservación de flujo en clientes y balance en centros
+    m.add_constraints((y_in - y_out).sum("K").sel(i=I_ids) == q, name="FlowClients")
+    m.add_constraints(
+        (y_out - y_in).sum("K").sel(i=C_ids).rename(i="c") - s == 0, name="FlowCenters"
+    )
+
+    # Rango útil y jornada máxima por vehículo (sin fila si el límite es inf)
+    for coef, lim, name in ((dist, rango, "Range"), (time, jornada, "Jornada")):
+        has_lim = np.isfinite(lim)
+        m.add_constraints((coef * xe).sum(["i", "j"]) - lim.where(has_lim, 0.0) * u <= 0,
+                          name=name, mask=has_lim)
+
+    # Suficiencia de oferta total
+    m.add_constraints(s.sum() == float(q.sum()), name="SupplyCover")
+
+    layout = {"C": C_ids, "I": I_ids, "K": K_ids}
+    return m, layout
+
+
+def solution_values(m, layout):
+    """
+    Valores de una solución linopy en el formato de dicts que usa
+    solve.export_solution: C, I, K, KA y x, y por (k,i,j); s por centro.
+    """
+    x = m.variables["x"]
+    labels = x.labels.to_series()
+    arcs = labels[labels >= 0].index            # (K, i, j) presentes
+    xv = x.solution.to_series().reindex(arcs).fillna(0.0)
+    yv = m.variables["y"].solution.to_series().reindex(arcs).fillna(0.0)
+    sv = m.variables["s"].solution.to_series().reindex(layout["C"]).fillna(0.0)
+    KA = list(arcs)
+    return {
+        "C": list(layout["C"]),
+        "I": set(layout["I"]),
+        "K": list(layout["K"]),
+        "KA": KA,
+        "x": dict(zip(KA, xv.to_numpy())),
+        "y": dict(zip(KA, yv.to_numpy())),
+        "s": dict(zip(sv.index, sv.to_numpy())),
+    }
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+Formulación del CVRP de LogistiCo sobre pyoptinterface (HiGHS).
+
+Misma matriz que model/build_model_fast.py (assemble_matrix); aquí se carga
+en un modelo pyoptinterface, que habla con la librería de HiGHS por su API
+en C sin pasar por Pyomo. Las restricciones se agregan por bloques de
+sentido (=, <=, >=) con add_m_linear_constraints.
+Requiere pyoptinterface (opcional; ver solve.py, BACKEND=poi).
+"""
+import os
+
+import numpy as np
+import scipy.sparse as sp
+import pyoptinterface as poi
+from pyoptinterface import highs
+
+from model.build_model_fast import assemble_matrix, values_from_columns
+
+
+def _load_highs():
+    """Carga libhighs: la del sistema o, si no, la que trae highspy."""
+    if highs.is_library_loaded() or highs.autoload_library():
+        return
+    try:
+        import highspy
+    except ImportError:
+        raise RuntimeError("pyoptinterface no encontró la librería de HiGHS")
+    libdir = os.path.dirname(highspy.__file__)
+    for name in sorted(os.listdir(libdir)):
+        if name.startswith("libhighs") and highs.load_library(os.path.join(libdir, name)):
+            return
+    raise RuntimeError("pyoptinterface no encontró la librería de HiGHS")
+
+
+def build_model_poi(data_dir: str):
+    """
+    Construye el MILP de LogistiCo como un pyoptinterface.highs.Model.
+
+    Devuelve (model, layout); layout como en build_model_fast, más la lista
+    de variables en orden de columnas (layout["vars"]).
+    """
+    mat, layout = assemble_matrix(data_dir)
+    _load_highs()
+
+    model = highs.Model()
+
+    # ---------------------------
+    # Variables (x, z, u binarias; y, s continuas)
+    # ---------------------------
+    lower, upper = mat["col_lower"], mat["col_upper"]
+    integer = mat["integrality"] == 1
+    vars_ = [
+        model.add_variable(lb=lb, ub=ub, domain=poi.VariableDomain.Binary)
+        if is_int else model.add_variable(lb=lb, ub=ub)
+        for lb, ub, is_int in zip(lower.tolist(), upper.tolist(), integer.tolist())
+    ]
+
+    # ---------------------------
+    # Restricciones por sentido
+    # ---------------------------
+    A = sp.csc_array(
+        (mat["value"], mat["index"], mat["start"]),
+        shape=(mat["n_row"], mat["n_col"]),
+    ).tocsr()
+    lo, up = mat["row_lower"], mat["row_upper"]
+    for rows, sense, rhs in (
+        (lo == up, poi.Eq, lo),
+        (np.isinf(lo) & np.isfinite(up), poi.Leq, up),
+        (np.isfinite(lo) & np.isinf(up), poi.Geq, lo),
+    ):
+        if rows.any():
+            model.add_m_linear_constraints(A[rows], vars_, sense, rhs[rows])
+
+    # ---------------------------
+    # Función objetivo
+    # ---------------------------
+    nz = np.flatnonzero(mat["col_cost"])
+    model.set_objective(
+        poi.ScalarAffineFunction(mat["col_cost"][nz].tolist(),
+                                 [vars_[c].index for c in nz]),
+        poi.ObjectiveSense.Minimize,
+    )
+
+    layout["vars"] = vars_
+    return model, layout
+
+
+def solution_values(model, layout):
+    """
+    Valores de la solución de `model` en el formato de dicts que usa
+    solve.export_solution: C, I, K, KA y x, y por (k,i,j); s por centro.
+    """
+    col = np.array([model.get_value(v) for v in layout["vars"]])
+    return values_from_columns(col, layout)
@@ -18,11 +18,11 @@ print("¿Suma s[c] == demanda total?:",
 
 print("\nCentro | supply (s[c]) | cap | violación cap?")
 print("----------------------------------------------")
-cap_map = centers.set_index("id")["capacity"].to_dict()
+cap_map = dict(zip(centers["id"], centers["capacity"]))
 
-for _, row in center_kpis.iterrows():
-    c = str(row["center"])
-    s = float(row["supply"])
+for row in center_kpis.itertuples(index=False):
+    c = str(row.center)
+    s = float(row.supply)
     cap = float(cap_map[c])
     violated = s > cap + 1e-6
     print(f"{c:6s} | {s:13.4f} | {cap:3.1f} | {'SI' if violated else 'NO'}")
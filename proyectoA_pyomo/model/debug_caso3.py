@@ -1,42 +1,135 @@
+from functools import lru_cache
 from pathlib import Path
 import pandas as pd
 from pyomo.environ import SolverFactory, TerminationCondition, SolverStatus
-from build_model import build_model
+from build_model import _read_inputs, build_model_core
 
 DATA_DIR = Path(__file__).resolve().parents[1]
 
 TIME_LIMIT = 600  # puedes subirlo a 1200 si quieres
 
-def solve_variant(label, deactivate=None):
+@lru_cache(maxsize=None)
+def _inputs():
+    """CSV del caso leídos una sola vez y compartidos por todos los escenarios."""
+    return _read_inputs(DATA_DIR)
+
+@lru_cache(maxsize=None)
+def _get_solver():
     """
-    Construye el modelo, desactiva algunas restricciones (por nombre)
-    y resuelve. Imprime si encontró solución factible o no.
+    Solver buscado una sola vez. Preferimos HiGHS persistente (APPSI): el
+    modelo queda cargado en el solver y entre escenarios sólo se envían los
+    cambios (restricciones activadas/desactivadas, variables fijadas).
+    Si no está, el primer SolverFactory disponible (HiGHS > CBC > GLPK).
+    """
+    try:
+        from pyomo.contrib.appsi.solvers import Highs
+        opt = Highs()
+        if opt.available():
+            opt.config.time_limit = TIME_LIMIT
+            opt.config.stream_solver = True
+            opt.config.load_solution = False  # sin incumbente no hay qué cargar
+            return "appsi_highs", opt
+    except ImportError:
+        pass
+    for s in ["highs", "cbc", "glpk"]:
+        opt = SolverFactory(s)
+        if opt.available(exception_flag=False):
+            return s, opt
+    return None, None
+
+def _access_denied(m, access):
+    """Arcos (k,i,j) de m.KA con algún extremo no accesible para k."""
+    if access is None:
+        return []
+    allowed = dict(zip(zip(access["node"], access["vehicle"]), access["allowed"]))
+    return [
+        (k, i, j) for (k, i, j) in m.KA
+        if allowed.get((i, k), 1.0) < 1.0 or allowed.get((j, k), 1.0) < 1.0
+    ]
+
+def build_base_model():
+    """
+    Modelo único para todos los escenarios: se arma sin la matriz de acceso
+    (todos los arcos existen) y el acceso urbano se impone fijando
+    x[k,i,j] = y[k,i,j] = 0 en los arcos prohibidos, que solve_variant
+    fija o libera según el escenario.
+
+    Tampoco se podan los arcos fuera de rango/jornada (los escenarios que
+    desactivan Range/Jornada deben poder usarlos) y se omite SymU: sus pares
+    saldrían de arcos sin podar por acceso y dejarían de ser válidos al fijar
+    los arcos prohibidos.
+    """
+    centers, clients, vehicles, arcs_cache, access = _inputs()
+    m = build_model_core(centers, clients, vehicles, arcs_cache, None,
+                         prune_limits=False, symmetry=False)
+    return m, _access_denied(m, access)
+
+def solve_variant(m, denied, label, deactivate=None, relax_access=False):
+    """
+    Desactiva algunas restricciones (por nombre) del modelo base y resuelve.
+    Imprime si encontró solución factible o no. Al terminar deja el modelo
+    como estaba (restricciones activas) para el siguiente escenario.
+
+    El acceso urbano no es una restricción sino x[k,i,j] = y[k,i,j] = 0
+    fijados en `denied`; con relax_access=True se liberan esos arcos.
     """
     print("\n" + "="*60)
     print(f"Escenario: {label}")
     print("="*60)
 
-    m = build_model(DATA_DIR)
-
     # Desactivar restricciones si aplica
-    if deactivate:
-        for cname in deactivate:
-            if hasattr(m, cname):
-                getattr(m, cname).deactivate()
-                print(f"  -> Restricción desactivada: {cname}")
-            else:
-                print(f"  (Aviso) El modelo no tiene restricción llamada {cname}")
-
-    # Escoger solver
-    for s in ["highs", "cbc", "glpk"]:
-        opt = SolverFactory(s)
-        if opt.available(exception_flag=False):
-            solver_name = s
-            break
-    else:
+    off = []
+    for cname in deactivate or []:
+        if hasattr(m, cname):
+            getattr(m, cname).deactivate()
+            off.append(getattr(m, cname))
+            print(f"  -> Restricción desactivada: {cname}")
+        else:
+            print(f"  (Aviso) El modelo no tiene restricción llamada {cname}")
+
+    for t in denied:
+        if relax_access:
+            m.x[t].unfix()
+            m.y[t].unfix()
+        else:
+            m.x[t].fix(0)
+            m.y[t].fix(0)
+    if relax_access:
+        print(f"  -> Acceso urbano relajado ({len(denied)} arcos liberados)")
+
+    # Escoger solver (memoizado entre escenarios)
+    solver_name, opt = _get_solver()
+    if opt is None:
         print("No hay solver disponible.")
         return
 
+    try:
+        print(f"Usando solver: {solver_name} con límite {TIME_LIMIT} s")
+        if solver_name == "appsi_highs":
+            return _solve_persistent(m, opt)
+        return _solve_legacy(m, opt, solver_name)
+    finally:
+        for c in off:
+            c.activate()
+
+def _solve_persistent(m, opt):
+    results = opt.solve(m)
+    term = results.termination_condition
+
+    print(f"Termination: {term}")
+
+    if results.best_feasible_objective is not None:
+        results.solution_loader.load_vars()
+        if term == type(term).optimal:
+            print("→ ¡Hay solución factible/óptima!")
+        else:
+            print("→ Límite de tiempo alcanzado, con incumbente factible.")
+        return m, results
+
+    print("→ No se encontró solución factible en este escenario.")
+    return None, results
+
+def _solve_legacy(m, opt, solver_name):
     opt.options = {}
     if solver_name == "highs":
         opt.options["time_limit"] = TIME_LIMIT
@@ -45,8 +138,6 @@ def solve_variant(label, deactivate=None):
     elif solver_name == "glpk":
         opt.options["tmlim"] = TIME_LIMIT
 
-    print(f"Usando solver: {solver_name} con límite {TIME_LIMIT} s")
-
     results = opt.solve(m, tee=True)
 
     status = results.solver.status
@@ -70,30 +161,38 @@ def solve_variant(label, deactivate=None):
 
 
 if __name__ == "__main__":
+    # Un solo modelo (y, con APPSI, un solo solver cargado) para los escenarios
+    m, denied = build_base_model()
+
     # Escenario 0: TODO activo (el que ya sabes que falla)
-    solve_variant("Caso3 - modelo completo", deactivate=[])
+    solve_variant(m, denied, "Caso3 - modelo completo", deactivate=[])
 
     # Escenario 1: sin capacidad de centros (CenterCap + SupplyCover)
     solve_variant(
+        m, denied,
         "Caso3 - sin capacidad de centros",
         deactivate=["CenterCap", "SupplyCover"]
     )
 
     # Escenario 2: sin restricciones de acceso urbano
     solve_variant(
-        "Caso3 - sin AccessI/AccessJ",
-        deactivate=["AccessI", "AccessJ"]
+        m, denied,
+        "Caso3 - sin acceso urbano",
+        deactivate=[],
+        relax_access=True
     )
 
     # Escenario 3: sin rango ni jornada
     solve_variant(
+        m, denied,
         "Caso3 - sin rango ni jornada",
-        deactivate=["RangeLimit", "WorkTime"]
+        deactivate=["Range", "Jornada"]
     )
 
     # Escenario 4: sin nada de lo anterior (solo CVRP clásico multi-centro)
     solve_variant(
+        m, denied,
         "Caso3 - sin centros, ni acceso, ni rango, ni jornada",
-        deactivate=["CenterCap", "SupplyCover", "AccessI", "AccessJ",
-                    "RangeLimit", "WorkTime"]
+        deactivate=["CenterCap", "SupplyCover", "Range", "Jornada"],
+        relax_access=True
     )
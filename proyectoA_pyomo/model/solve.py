@@ -1,23 +1,157 @@
 
 import os, json, pandas as pd, numpy as np
+from functools import lru_cache
 from pyomo.opt import SolverStatus, TerminationCondition
 from pathlib import Path
 
+from model.build_model import _read_first_existing, _parquet_first
+
 
 DATA_DIR = str(Path(__file__).resolve().parents[1])
 
+@lru_cache(maxsize=None)
+def _load_arcs(data_dir):
+    # arcs_cache completo (Parquet si está al día, si no CSV), leído una sola
+    # vez por proceso; export_arcs_cache y export_solution comparten el frame
+    return _read_first_existing(
+        _parquet_first(Path(data_dir) / "outputs" / "tables" / "arcs_cache.csv")
+    )
+
 def export_arcs_cache():
     # Ensure arcs_cache.csv exists for the MILP (built by preprocess)
-    arcs_cache = pd.read_csv(f"{DATA_DIR}/outputs/tables/arcs_cache.csv")
+    arcs_cache = _load_arcs(DATA_DIR)
     return arcs_cache
 
+def try_milp_linopy(time_limit):
+    """
+    Backend alternativo (LINOPY=1): arma el modelo con linopy y lo resuelve
+    con HiGHS sin pasar por el escritor de Pyomo. Devuelve (valores, msg),
+    donde valores es el dict de solution_values que acepta export_solution.
+    """
+    from model.build_model_linopy import build_model_linopy, solution_values
+
+    m, layout = build_model_linopy(DATA_DIR)
+    print(f"Usando solver: highs (linopy) con límite de {time_limit} s\n")
+    status, term_cond = m.solve(solver_name="highs", time_limit=time_limit)
+
+    print("Solver status:", status)
+    print("Termination condition:", term_cond)
+
+    if status == "ok" and term_cond == "optimal":
+        print("→ Usando solución (optimal/feasible).")
+        return solution_values(m, layout), "OK"
+    # Sin incumbente linopy deja objective.value en inf (no None)
+    obj = m.objective.value
+    if term_cond == "time_limit" and obj is not None and np.isfinite(obj):
+        print("→ Time limit reached PERO con incumbente factible. Usando mejor solución encontrada.")
+        return solution_values(m, layout), "TIME_LIMIT_FEASIBLE"
+    return None, f"Solver status: {status}, termination: {term_cond}"
+
+def try_milp_highs(time_limit):
+    """
+    Camino directo con HiGHS: la matriz se arma con numpy
+    (build_model_fast) y se pasa a highspy, sin el modelo Pyomo ni el
+    archivo LP intermedio. Devuelve (valores, msg) como try_milp_linopy.
+    """
+    import highspy
+    from model.build_model_fast import build_model_fast, solution_values
+
+    h, layout = build_model_fast(DATA_DIR)
+    h.setOptionValue("time_limit", float(time_limit))
+    print(f"Usando solver: highs (highspy directo) con límite de {time_limit} s\n")
+    h.run()
+
+    status = h.getModelStatus()
+    has_sol = h.getInfo().primal_solution_status == 2   # kSolutionStatusFeasible
+    print("Solver status:", h.modelStatusToString(status))
+
+    if status == highspy.HighsModelStatus.kOptimal:
+        print("→ Usando solución (optimal/feasible).")
+        return solution_values(h, layout), "OK"
+    if status == highspy.HighsModelStatus.kTimeLimit and has_sol:
+        print("→ Time limit reached PERO con incumbente factible. Usando mejor solución encontrada.")
+        return solution_values(h, layout), "TIME_LIMIT_FEASIBLE"
+    return None, f"Solver status: {h.modelStatusToString(status)}"
+
+def try_milp_poi(time_limit):
+    """
+    Backend alternativo (BACKEND=poi): la matriz de build_model_fast se carga
+    en HiGHS con pyoptinterface. Devuelve (valores, msg) como try_milp_linopy.
+    """
+    import pyoptinterface as poi
+    from model.build_model_poi import build_model_poi, solution_values
+
+    model, layout = build_model_poi(DATA_DIR)
+    model.set_model_attribute(poi.ModelAttribute.TimeLimitSec, float(time_limit))
+    print(f"Usando solver: highs (pyoptinterface) con límite de {time_limit} s\n")
+    model.optimize()
+
+    term = model.get_model_attribute(poi.ModelAttribute.TerminationStatus)
+    has_sol = model.get_model_attribute(poi.ModelAttribute.PrimalStatus) == \
+        poi.ResultStatusCode.FEASIBLE_POINT
+    print("Termination condition:", term)
+
+    if term == poi.TerminationStatusCode.OPTIMAL:
+        print("→ Usando solución (optimal/feasible).")
+        return solution_values(model, layout), "OK"
+    if term == poi.TerminationStatusCode.TIME_LIMIT and has_sol:
+        print("→ Time limit reached PERO con incumbente factible. Usando mejor solución encontrada.")
+        return solution_values(model, layout), "TIME_LIMIT_FEASIBLE"
+    return None, f"Termination: {term}"
+
+def _appsi_available():
+    """True si la interfaz APPSI de Pyomo encuentra HiGHS (highspy)."""
+    try:
+        from pyomo.contrib.appsi.solvers import Highs
+    except ImportError:
+        return False
+    return bool(Highs().available())
+
+def try_milp_appsi(time_limit):
+    """
+    Backend alternativo (BACKEND=appsi): modelo Pyomo resuelto con la interfaz
+    APPSI de HiGHS, que pasa el modelo a HiGHS en memoria (sin archivo LP).
+    Devuelve (m, msg) como la rama Pyomo de try_milp.
+    """
+    from pyomo.contrib.appsi.solvers import Highs
+    from pyomo.contrib.appsi.base import TerminationCondition as AppsiTC
+    from model.build_model import build_model
+
+    opt = Highs()
+    opt.config.time_limit = time_limit
+    opt.config.stream_solver = True
+    opt.config.load_solution = False   # sin incumbente no hay qué cargar
+
+    m = build_model(DATA_DIR)
+    print(f"Usando solver: highs (APPSI) con límite de {time_limit} s\n")
+    res = opt.solve(m)
+
+    term_cond = res.termination_condition
+    print("Termination condition:", term_cond)
+
+    if res.best_feasible_objective is None:
+        return None, f"Termination: {term_cond}"
+    res.solution_loader.load_vars()
+    if term_cond == AppsiTC.optimal:
+        print("→ Usando solución (optimal/feasible).")
+        return m, "OK"
+    print("→ Time limit reached PERO con incumbente factible. Usando mejor solución encontrada.")
+    return m, "TIME_LIMIT_FEASIBLE"
+
 def try_milp():
     try:
+        TIME_LIMIT = 1200  # <----------------------------- TIME LIMIT EN SEGUNDOS
+
+        if os.environ.get("LINOPY") == "1":
+            return try_milp_linopy(TIME_LIMIT)
+        if os.environ.get("BACKEND") == "poi":
+            return try_milp_poi(TIME_LIMIT)
+        if os.environ.get("BACKEND") == "appsi" and _appsi_available():
+            return try_milp_appsi(TIME_LIMIT)
+
         from pyomo.environ import SolverFactory
         from model.build_model import build_model
 
-        m = build_model(DATA_DIR)
-
         solver = None
         solver_name = None
 
@@ -31,11 +165,13 @@ def try_milp():
         if solver is None:
             return None, "No solver available"
 
-        TIME_LIMIT = 1200  # <----------------------------- TIME LIMIT EN SEGUNDOS
-
+        # Con HiGHS disponible (highspy) se evita Pyomo y su escritor LP
         if solver_name == "highs":
-            solver.options["time_limit"] = TIME_LIMIT
-        elif solver_name == "cbc":
+            return try_milp_highs(TIME_LIMIT)
+
+        m = build_model(DATA_DIR)
+
+        if solver_name == "cbc":
             solver.options["seconds"] = TIME_LIMIT
         elif solver_name == "glpk":
             solver.options["tmlim"] = TIME_LIMIT
@@ -70,20 +206,40 @@ def try_milp():
 
 
 
+def _solution_values(m):
+    """
+    Valores de la solución Pyomo como dicts simples (mismo formato que
+    build_model_linopy.solution_values), para que export_solution no dependa
+    del backend.
+    """
+    # get_values(): un dict {índice: valor} por componente, en una pasada
+    x_val = m.x.get_values()
+    return {
+        "C": list(m.C),
+        "I": set(m.I),
+        "K": list(m.K),
+        "KA": list(x_val),
+        "x": x_val,
+        "y": m.y.get_values(),
+        "s": m.s.get_values(),
+    }
+
 def export_solution(m):
+    # m: modelo Pyomo resuelto o dict de valores (backend linopy)
+    sol = m if isinstance(m, dict) else _solution_values(m)
+    x_val, y_val, s_val, I_set = sol["x"], sol["y"], sol["s"], sol["I"]
+
     # Read input frames
     centers = pd.read_csv(f"{DATA_DIR}/inputs/nodes_centers.csv")
     clients = pd.read_csv(f"{DATA_DIR}/inputs/nodes_clients.csv")
     vehicles = pd.read_csv(f"{DATA_DIR}/inputs/vehicles.csv")
     # Export x arcs
-    sel = []
-    for k in m.K:
-        for (i,j) in m.A:
-            if m.x[k,i,j].value and m.x[k,i,j].value > 0.5:
-                sel.append({"vehicle":k, "from":i, "to":j})
-    sel_df = pd.DataFrame(sel)
+    sel_df = pd.DataFrame(
+        [t for t, v in x_val.items() if v and v > 0.5],
+        columns=["vehicle", "from", "to"],
+    )
     # fetch cost/time/dist from cache
-    arcs_df = pd.read_csv(f"{DATA_DIR}/outputs/tables/arcs_cache.csv")
+    arcs_df = _load_arcs(DATA_DIR)
   
     arcs_df = arcs_df.rename(columns={
         "veh": "vehicle",
@@ -100,20 +256,18 @@ def export_solution(m):
     sel_df.to_csv(f"{DATA_DIR}/outputs/tables/selected_arcs_detailed.csv", index=False)
 
     # Export flows
-    flows = []
-    for k in m.K:
-        for (i,j) in m.A:
-            v = float(m.y[k,i,j].value) if m.y[k,i,j].value is not None else 0.0
-            if v>1e-6:
-                flows.append({"vehicle":k,"from":i,"to":j,"flow":v})
-    
-    flows_df = pd.DataFrame(flows)
+    # (y_df: todos los arcos con flujo no nulo; se exportan los > 1e-6)
+    y_df = pd.DataFrame(
+        [(k, i, j, float(v)) for (k, i, j), v in y_val.items() if v],
+        columns=["vehicle", "from", "to", "flow"],
+    )
+    flows_df = y_df[y_df["flow"] > 1e-6]
     flows_df.to_csv(f"{DATA_DIR}/outputs/tables/flows_by_arc_per_vehicle.csv", index=False)
 
     # KPIs centers
     center_kpis = []
-    for c in m.C:
-        s = float(m.s[c].value) if m.s[c].value is not None else 0.0
+    for c in sol["C"]:
+        s = float(s_val[c]) if s_val[c] is not None else 0.0
         cap = float(centers.set_index("id").loc[c,"capacity"])
         center_kpis.append({
             "center":c,
@@ -123,42 +277,26 @@ def export_solution(m):
         })
     pd.DataFrame(center_kpis).to_csv(f"{DATA_DIR}/outputs/tables/center_kpis.csv", index=False)
 
-    # KPIs vehicles
-    veh_kpis = []
-    for k in m.K:
-        used_arcs = sel_df[sel_df["vehicle"] == k]
-        dist = used_arcs["dist_km"].sum()
-        time = used_arcs["time_h"].sum()
-        cost = used_arcs["cost"].sum()
-
-        # carga entregada (flujo que llega a clientes)
-        load = 0.0
-        for i in m.I:  # Para cada cliente
-            # Flujo neto = entra - sale
-            flow_in = sum(
-                float(m.y[k, j, i].value or 0.0)
-                for (j, ii) in m.A if ii == i
-            )
-            flow_out = sum(
-                float(m.y[k, i, j].value or 0.0)
-                for (ii, j) in m.A if ii == i
-            )
-            # La demanda satisfecha es el flujo neto
-            delivered = flow_in - flow_out
-            if delivered > 1e-6:
-                load += delivered
-
-        cap = float(vehicles.set_index("id").loc[k, "Q"])
-        veh_kpis.append({
-            "vehicle": k,
-            "distance_km": dist,
-            "time_h": time,
-            "cost": cost,
-            "load_delivered": load,
-            "capacity": cap,
-        })
-        
-    pd.DataFrame(veh_kpis).to_csv(f"{DATA_DIR}/outputs/tables/vehicle_kpis.csv", index=False)
+    # Carga entregada por vehículo: suma de los flujos netos (entra - sale)
+    # positivos en sus clientes, con groupby sobre los arcos con flujo
+    inflow = y_df[y_df["to"].isin(I_set)].groupby(["vehicle", "to"])["flow"].sum()
+    outflow = y_df[y_df["from"].isin(I_set)].groupby(["vehicle", "from"])["flow"].sum()
+    inflow.index.names = outflow.index.names = ["vehicle", "client"]
+    net_flow = inflow.sub(outflow, fill_value=0.0)
+    load_by_veh = net_flow[net_flow > 1e-6].groupby(level="vehicle").sum()
+
+    # KPIs vehicles: totales de arcos usados (groupby), carga entregada y
+    # capacidad unidos por vehículo en un solo DataFrame
+    veh_kpis = (
+        sel_df.groupby("vehicle")[["dist_km", "time_h", "cost"]].sum()
+        .reindex(pd.Index(sol["K"], name="vehicle"), fill_value=0.0)
+        .rename(columns={"dist_km": "distance_km"})
+        .join(load_by_veh.rename("load_delivered"))
+        .join(vehicles.set_index("id")["Q"].astype(float).rename("capacity"))
+        .fillna({"load_delivered": 0.0})
+        .reset_index()
+    )
+    veh_kpis.to_csv(f"{DATA_DIR}/outputs/tables/vehicle_kpis.csv", index=False)
 
 if __name__=="__main__":
     export_arcs_cache()
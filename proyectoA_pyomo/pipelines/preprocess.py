@@ -1,14 +1,332 @@
-import os, json, math, pandas as pd
-from math import radians, sin, cos, sqrt, atan2
+import os, json, math, hashlib, shutil, pandas as pd
+import numpy as np
 from pathlib import Path
 
-def haversine_km(lat1, lon1, lat2, lon2):
+ROOT = Path(__file__).resolve().parents[1]
+DATA = ROOT / "data"
+INPUTS = ROOT / "inputs"
+TABLES = ROOT / "outputs" / "tables"
+
+# Numba es opcional: sólo se usa si PREPROCESS_JIT=numba y está instalado
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# scikit-learn también es opcional: su haversine_distances es C compilado
+try:
+    from sklearn.metrics.pairwise import haversine_distances
+except ImportError:
+    haversine_distances = None
+
+def _haversine_matrix_py(lat, lon, cos_lat, out):
+    """
+    Kernel por pares (i, j) de haversine_matrix_km para compilar con numba.
+    La distancia es simétrica: sólo se evalúa j > i y se copia a (j, i).
+    cos_lat trae el coseno de cada latitud, calculado una vez por punto.
+    """
     R = 6371.0
-    dlat = radians(lat2-lat1)
-    dlon = radians(lon2-lon1)
-    a = sin(dlat/2)**2 + cos(radians(lat1))*cos(radians(lat2))*sin(dlon/2)**2
-    c = 2 * atan2(sqrt(a), sqrt(1-a))
-    return R * c
+    n = lat.shape[0]
+    for i in numba.prange(n):
+        out[i, i] = 0.0
+        for j in range(i + 1, n):
+            dlat = np.radians(lat[j] - lat[i])
+            dlon = np.radians(lon[j] - lon[i])
+            a = (np.sin(dlat/2)**2
+                 + cos_lat[i]*cos_lat[j]*np.sin(dlon/2)**2)
+            out[i, j] = out[j, i] = R * 2 * np.arctan2(np.sqrt(a), np.sqrt(1-a))
+    return out
+
+
+# Compilado sólo bajo demanda (cache=True guarda el binario entre corridas)
+_haversine_matrix_jit = None
+
+
+def haversine_matrix_km(lat, lon):
+    """
+    Matriz N x N de distancias haversine (km, R = 6371) entre todos los
+    pares de puntos (lat, lon en grados); se evalúa el triángulo superior
+    y se simetriza.
+
+    Con PREPROCESS_JIT=numba (y numba instalado) usa el kernel compilado
+    y paralelo sobre i; útil para N grande o corridas repetidas. Si no, y
+    scikit-learn está instalado, usa su haversine_distances (misma fórmula
+    en forma arcsin, ~2x más rápida que el broadcasting de numpy).
+    """
+    global _haversine_matrix_jit
+    R = 6371.0
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+
+    # Puntos repetidos (clientes en la misma ubicación, CD junto a un
+    # cliente): se calcula sobre los únicos y se expande con el inverso
+    pts, inv = np.unique(np.column_stack([lat, lon]), axis=0, return_inverse=True)
+    if len(pts) < len(lat):
+        inv = inv.ravel()
+        return haversine_matrix_km(pts[:, 0], pts[:, 1])[np.ix_(inv, inv)]
+
+    if numba is not None and os.environ.get("PREPROCESS_JIT") == "numba":
+        if _haversine_matrix_jit is None:
+            _haversine_matrix_jit = numba.njit(cache=True, parallel=True)(_haversine_matrix_py)
+        return _haversine_matrix_jit(lat, lon, np.cos(np.radians(lat)),
+                                     np.empty((len(lat), len(lat))))
+    if haversine_distances is not None:
+        return haversine_distances(np.radians(np.column_stack([lat, lon]))) * R
+    # Sólo el triángulo superior (i < j); la matriz es simétrica
+    iu, ju = np.triu_indices(len(lat), k=1)
+    dlat = np.radians(lat[ju] - lat[iu])
+    dlon = np.radians(lon[ju] - lon[iu])
+    cos_lat = np.cos(np.radians(lat))
+    a = np.sin(dlat/2)**2 + cos_lat[iu]*cos_lat[ju]*np.sin(dlon/2)**2
+    d = R * 2 * np.arctan2(np.sqrt(a), np.sqrt(1-a))
+    out = np.zeros((len(lat), len(lat)))
+    out[iu, ju] = d
+    out[ju, iu] = d
+    return out
+
+
+def _arc_costs_py(d, v_idx, inv_speed, fuel_per_km, C_dist, C_time,
+                  t, fuel_cost, dist_cost, time_cost, total):
+    """Kernel por arco de arc_costs para compilar con numba."""
+    for a in numba.prange(d.shape[0]):
+        v = v_idx[a]
+        t[a] = d[a] * inv_speed[v]
+        fuel_cost[a] = d[a] * fuel_per_km[v]
+        dist_cost[a] = d[a] * C_dist
+        time_cost[a] = t[a] * C_time
+        total[a] = fuel_cost[a] + dist_cost[a] + time_cost[a]
+
+
+_arc_costs_jit = None
+
+
+def arc_costs(d, v_idx, speed, eff, fuel_price, C_dist, C_time):
+    """
+    Tiempo y costos por arco (d en km, v_idx de arc_grid; speed y eff por
+    vehículo). Velocidad o eficiencia no positivas dan tiempo / combustible 0.
+
+    1/speed y fuel_price/eff se calculan una vez por vehículo: por arco sólo
+    quedan productos. Devuelve (t, fuel_cost, dist_cost, time_cost, total).
+    Con PREPROCESS_JIT=numba usa un kernel compilado que recorre los arcos
+    una sola vez, sin los temporales de numpy.
+    """
+    global _arc_costs_jit
+    speed = np.asarray(speed, dtype=float)
+    eff = np.asarray(eff, dtype=float)
+    inv_speed = np.divide(1.0, speed, out=np.zeros_like(speed), where=speed > 0)
+    fuel_per_km = np.divide(fuel_price, eff, out=np.zeros_like(eff), where=eff > 0)
+    if numba is not None and os.environ.get("PREPROCESS_JIT") == "numba":
+        if _arc_costs_jit is None:
+            _arc_costs_jit = numba.njit(cache=True, parallel=True)(_arc_costs_py)
+        out = tuple(np.empty_like(d) for _ in range(5))
+        _arc_costs_jit(d, v_idx, inv_speed, fuel_per_km,
+                       float(C_dist), float(C_time), *out)
+        return out
+    t          = d * inv_speed[v_idx]
+    fuel_cost  = d * fuel_per_km[v_idx]
+    dist_cost  = d * C_dist
+    time_cost  = t * C_time
+    total      = fuel_cost + dist_cost + time_cost
+    return t, fuel_cost, dist_cost, time_cost, total
+
+
+def write_arcs_cache(arcs_df, csv_path):
+    """
+    Escribe arcs_cache como CSV (tablas LaTeX, verificadores) y, si hay
+    pyarrow, también una copia .parquet al lado: el modelo la prefiere por
+    ser columnar y conservar los tipos.
+
+    Con pyarrow ambos archivos salen de una misma pyarrow.Table y el CSV se
+    escribe por lotes con su escritor en C (mucho más rápido que to_csv en
+    Caso 3 completo); sin pyarrow, o si algún id necesitara comillas, se
+    usa to_csv de pandas.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pa_csv
+        import pyarrow.parquet as pq
+    except ImportError:
+        arcs_df.to_csv(csv_path, index=False)
+        # sin pyarrow no hay .parquet nuevo: se borra el de una corrida anterior
+        csv_path.with_suffix(".parquet").unlink(missing_ok=True)
+        return
+
+    table = pa.Table.from_pandas(arcs_df, preserve_index=False)
+    try:
+        with open(csv_path, "wb") as f:
+            # encabezado a mano: pyarrow siempre lo escribe entre comillas
+            f.write((",".join(arcs_df.columns) + "\n").encode("utf-8"))
+            pa_csv.write_csv(table, f, write_options=pa_csv.WriteOptions(
+                include_header=False, quoting_style="none", batch_size=1 << 16))
+    except pa.ArrowInvalid:
+        arcs_df.to_csv(csv_path, index=False)
+    # ids (vehicle/from/to) codificados como diccionario
+    pq.write_table(table, csv_path.with_suffix(".parquet"), compression="zstd",
+                   use_dictionary=True)
+
+
+def categorical_ids(codes, categories):
+    """
+    ids de `categories` en las posiciones `codes` como categórica (códigos
+    enteros, sin un objeto str por fila); si hay ids repetidos, array object.
+    """
+    categories = pd.Index(categories)
+    if categories.is_unique:
+        return pd.Categorical.from_codes(codes, categories=categories)
+    return categories.to_numpy(dtype=object)[codes]
+
+
+def arc_grid(N, veh_ids, alpha=1.0):
+    """
+    Todas las combinaciones (vehículo, i, j) con i != j sobre los nodos de N
+    (columnas id, lat, lon), en el mismo orden que los bucles
+    vehículo -> i -> j.
+
+    Devuelve (v_idx, veh, i, j, d): v_idx es la posición del vehículo en
+    veh_ids (para indexar sus parámetros por arco) y d la distancia en km
+    (haversine * alpha) de cada arco. veh, i, j son categóricas sobre los
+    ids (códigos enteros, sin un objeto str por arco).
+    """
+    ids = pd.Index(N["id"])
+    veh_ids = pd.Index(veh_ids)
+    d_mat = haversine_matrix_km(N["lat"], N["lon"]) * alpha
+
+    ii, jj = np.nonzero(~np.eye(len(ids), dtype=bool))
+    n_pairs, n_veh = len(ii), len(veh_ids)
+
+    v_idx = np.repeat(np.arange(n_veh), n_pairs)
+    return (
+        v_idx,
+        categorical_ids(v_idx, veh_ids),
+        categorical_ids(np.tile(ii, n_veh), ids),
+        categorical_ids(np.tile(jj, n_veh), ids),
+        np.tile(d_mat[ii, jj], n_veh),
+    )
+
+
+def arc_frame(cols, decimals=3):
+    """
+    DataFrame de arcos a partir de un dict de columnas numpy (SoA). Las
+    columnas float se redondean en sitio antes de armar el frame, en vez de
+    DataFrame.round(), que copia la tabla completa.
+    """
+    for v in cols.values():
+        if v.dtype.kind == "f":
+            np.round(v, decimals, out=v)
+    return pd.DataFrame(cols, copy=False)
+
+
+def build_arcs(N, vehicles, eff_col, fuel_price, C_dist=0.0, C_time=0.0,
+               alpha=1.0, id_cols=("vehicle", "from", "to"), cost_detail=True):
+    """
+    arcs_cache de un caso: arc_grid + arc_costs + arc_frame.
+
+    N: nodos (id, lat, lon); vehicles: id, speed_kph y la columna de
+    eficiencia `eff_col` (km por unidad de combustible). id_cols son los
+    nombres de las columnas (vehículo, origen, destino); con cost_detail
+    se incluyen fuel_cost, dist_cost y time_cost además de cost.
+
+    Se emiten también los arcos que exceden rango_util_km / jornada_max_h
+    del vehículo: los poda el modelo (_prune_arcs), y los escenarios sin
+    rango / sin jornada de debug_caso3 los necesitan en los datos.
+    """
+    v_idx, veh, i, j, d = arc_grid(N, vehicles["id"], alpha)
+    t, fuel_cost, dist_cost, time_cost, total = arc_costs(
+        d, v_idx, vehicles["speed_kph"], vehicles[eff_col],
+        fuel_price, C_dist, C_time)
+
+    cols = {id_cols[0]: veh, id_cols[1]: i, id_cols[2]: j,
+            "dist_km": d, "time_h": t, "cost": total}
+    if cost_detail:
+        cols.update(fuel_cost=fuel_cost, dist_cost=dist_cost, time_cost=time_cost)
+    arcs_df = arc_frame(cols)
+
+    arcs_df["allowed_pair"] = np.int8(1)
+    return arcs_df
+
+
+# Columnas que usan los builders de cada archivo fuente y sus tipos (el
+# resto de columnas no se lee; los numéricos no listados se infieren)
+SOURCE_COLS = {
+    "clients":    ["ClientID", "StandardizedID", "Latitude", "Longitude", "Demand",
+                   "VehicleSizeRestriction"],
+    "vehicles":   ["StandardizedID", "VehicleType", "Capacity", "Range"],
+    "depots":     ["StandardizedID", "Latitude", "Longitude", "Capacity"],
+    "parameters": ["Parameter", "Value"],
+}
+SOURCE_DTYPES = {
+    "StandardizedID": str, "VehicleType": str, "VehicleSizeRestriction": str,
+    "Latitude": float, "Longitude": float, "Parameter": str,
+}
+
+
+def read_source(path, kind):
+    """read_csv de un archivo fuente con sólo las columnas de SOURCE_COLS[kind]."""
+    cols = set(SOURCE_COLS[kind])
+    return pd.read_csv(path, usecols=lambda c: c in cols, dtype=SOURCE_DTYPES)
+
+
+def make_output_dirs():
+    """Crea inputs/ y outputs/tables/ si no existen."""
+    INPUTS.mkdir(parents=True, exist_ok=True)
+    TABLES.mkdir(parents=True, exist_ok=True)
+
+
+def mirror_to_tables(*names):
+    """
+    Copia inputs/<name> (y su .parquet, si se escribió junto con él) a
+    outputs/tables/ sin volver a serializar. Copia y no hardlink: otras
+    etapas reescriben outputs/tables/ con to_csv, que truncaría también el
+    archivo de inputs/.
+
+    Un .parquet más viejo que el CSV no se copia, y el de outputs/tables/
+    se borra: la copia tendría mtime nuevo y el modelo la preferiría.
+    """
+    for name in names:
+        src = INPUTS / name
+        if not src.exists():
+            continue
+        shutil.copyfile(src, TABLES / src.name)
+        pq = src.with_suffix(".parquet")
+        if pq.exists() and pq.stat().st_mtime >= src.stat().st_mtime:
+            shutil.copyfile(pq, TABLES / pq.name)
+        else:
+            (TABLES / pq.name).unlink(missing_ok=True)
+
+
+def inputs_key(base, files, *extra):
+    """
+    SHA-256 de los CSV fuente en `base`, de `extra` (caso, max_clients...) y
+    del código de este módulo: cambia si cambian los datos, los argumentos
+    o la forma de construir los arcos.
+    """
+    h = hashlib.sha256(Path(__file__).read_bytes())
+    for name in files:
+        h.update((base / name).read_bytes())
+    h.update(repr(extra).encode("utf-8"))
+    return h.hexdigest()
+
+
+# Archivos que escribe todo builder de inputs (más los `extra` de cada caso)
+INPUT_OUTPUTS = ("nodes_centers.csv", "nodes_clients.csv", "vehicles.csv",
+                 "economics.csv", "arcs_cache.csv")
+
+
+def inputs_cached(key, *extra):
+    """
+    True si inputs/ y outputs/tables/ ya tienen el arcs_cache de `key`
+    (sidecar inputs/arcs_cache.sha256) y siguen en inputs/ todos los
+    archivos que escribe el builder (INPUT_OUTPUTS más `extra`, p. ej.
+    access.csv en el Caso 3). Borrar el sidecar fuerza la reconstrucción.
+    """
+    sidecar = INPUTS / "arcs_cache.sha256"
+    return (sidecar.exists() and sidecar.read_text().strip() == key
+            and all((INPUTS / name).exists() for name in INPUT_OUTPUTS + extra)
+            and (TABLES / "arcs_cache.csv").exists())
+
+
+def store_inputs_key(key):
+    (INPUTS / "arcs_cache.sha256").write_text(key + "\n")
 
 
 def build_inputs_from_base():
@@ -18,19 +336,28 @@ def build_inputs_from_base():
     """
     # MAX_CLIENTS = 30   # <-- prueba con 10 clientes
     # MAX_VEHICLES = None 
-    ROOT = str(Path(__file__).resolve().parents[1])
 
     # ---------------------------
     # 1. Leer datos originales
     # ---------------------------
-    base = Path(f"{ROOT}/data/Proyecto_A_Caso1")
-
-    clients = pd.read_csv(base / "clients.csv")
-    vehicles = pd.read_csv(base / "vehicles.csv")
-    depots   = pd.read_csv(base / "depots.csv")
-    params   = pd.read_csv(base / "parameters_base.csv")
+    base = DATA / "Proyecto_A_Caso1"
+    key = inputs_key(base, ["clients.csv", "vehicles.csv", "depots.csv",
+                            "parameters_base.csv"], "base")
+    if inputs_cached(key):
+        print("CVRP Base Case inputs up to date (arcs_cache cached).")
+        return
+
+    clients = read_source(base / "clients.csv", "clients")
+    vehicles = read_source(base / "vehicles.csv", "vehicles")
+    depots   = read_source(base / "depots.csv", "depots")
+    params   = read_source(base / "parameters_base.csv", "parameters")
     
-    pivot = params.set_index("Parameter")["Value"]
+    # Parámetros como escalares, una sola vez
+    pivot = params.set_index("Parameter")["Value"].to_dict()
+    C_fixed    = pivot.get("C_fixed", 0)
+    C_dist     = pivot.get("C_dist", 0)
+    C_time     = pivot.get("C_time", 0)
+    fuel_price = pivot.get("FuelPrice", 16300) # valor sugerido en README base
 
     # if MAX_CLIENTS is not None:
     #     # Ordenamos por algún ID estable y tomamos solo los primeros N
@@ -72,9 +399,9 @@ def build_inputs_from_base():
         "Q":                vehicles["Capacity"],
         "speed_kph":        40,
         "fuel_eff_kmpl":    30.0,
-        "fuel_price_per_l": pivot.get("FuelPrice", 16300),
-        "cost_hour":        pivot.get("C_time", 0),
-        "fixed_cost":       pivot.get("C_fixed", 0),
+        "fuel_price_per_l": fuel_price,
+        "cost_hour":        C_time,
+        "fixed_cost":       C_fixed,
         "rango_util_km":    vehicles["Range"],
         "jornada_max_h":    24
     })
@@ -82,16 +409,9 @@ def build_inputs_from_base():
     # ---------------------------
     # 5. Construir economics.csv a partir de parameters_base.csv: Parameter, Value, Unit, Description
     # ---------------------------
-    pivot = params.set_index("Parameter")["Value"]
-
     economics_internal = pd.DataFrame({
         "parameter": ["C_fixed", "C_dist", "C_time", "fuel_price"],
-        "value": [
-            pivot.get("C_fixed", 0),
-            pivot.get("C_dist", 0),
-            pivot.get("C_time", 0),
-            pivot.get("FuelPrice", 16300), # valor sugerido en README base
-        ]
+        "value": [C_fixed, C_dist, C_time, fuel_price]
     })
 
     # ---------------------------
@@ -102,64 +422,28 @@ def build_inputs_from_base():
         nodes_clients[["id","lat","lon"]]
     ], ignore_index=True)
 
-    nodes_dict = {row["id"]:(row["lat"],row["lon"]) for _,row in N.iterrows()}
-
-    arcs = []
     alpha = 1.0
-    fuel_price = economics_internal.loc[economics_internal["parameter"]=="fuel_price","value"].values[0]
-
-    for _, v in vehicles_internal.iterrows():
-        v_id = v["id"]
-        speed = v["speed_kph"]
-        kmpl  = v["fuel_eff_kmpl"]
-
-        for i,(lat1,lon1) in nodes_dict.items():
-            for j,(lat2,lon2) in nodes_dict.items():
-                if i == j:
-                    continue
-                d = haversine_km(lat1,lon1,lat2,lon2) * alpha
-                t = d / max(speed,1e-6)
-
-                fuel_cost = (d / kmpl) * fuel_price
-                dist_cost = 0
-                time_cost = 0
-                total = fuel_cost + dist_cost + time_cost
-
-                arcs.append({
-                    "veh": v_id,
-                    "i": i,
-                    "j": j,
-                    "dist_km": round(d,3),
-                    "time_h": round(t,3),
-                    "cost": round(total,3),
-                    "fuel_cost": round(fuel_cost, 3),
-                    "dist_cost": 0.0,
-                    "time_cost": 0.0, 
-                    "allowed_pair": 1
-                })
-
-    arcs_df = pd.DataFrame(arcs)
+
+    # dist_cost = time_cost = 0 en el caso base
+    arcs_df = build_arcs(N, vehicles_internal, "fuel_eff_kmpl", fuel_price,
+                         alpha=alpha, id_cols=("veh", "i", "j"))
 
     # ---------------------------
     # 7. Guardar todo en `inputs/` y espejos en `outputs/tables/`
     # ---------------------------
-    INPUTS = Path(f"{ROOT}/inputs")
-    TABLES = Path(f"{ROOT}/outputs/tables")
-    INPUTS.mkdir(parents=True, exist_ok=True)
-    TABLES.mkdir(parents=True, exist_ok=True)
+    make_output_dirs()
 
     # Entradas para el modelo
     nodes_centers.to_csv(INPUTS / "nodes_centers.csv", index=False)
     nodes_clients.to_csv(INPUTS / "nodes_clients.csv", index=False)
     vehicles_internal.to_csv(INPUTS / "vehicles.csv", index=False)
     economics_internal.to_csv(INPUTS / "economics.csv", index=False)
-    arcs_df.to_csv(INPUTS / "arcs_cache.csv", index=False)
+    write_arcs_cache(arcs_df, INPUTS / "arcs_cache.csv")
 
     # Espejos para tablas / compatibilidad con código original
-    nodes_centers.to_csv(TABLES / "nodes_centers.csv", index=False)
-    nodes_clients.to_csv(TABLES / "nodes_clients.csv", index=False)
-    arcs_df.to_csv(TABLES / "arcs_cache.csv", index=False)
+    mirror_to_tables("nodes_centers.csv", "nodes_clients.csv", "arcs_cache.csv")
 
+    store_inputs_key(key)
     print("Preprocessing for CVRP Base Case completed successfully.")
 
 
@@ -169,14 +453,18 @@ def build_inputs_from_caso2():
     Lee data/Proyecto_A_Caso2 y construye los inputs/ que usa el modelo.
     """
 
-    ROOT = Path(__file__).resolve().parents[1]
-    base = ROOT / "data" / "Proyecto_A_Caso2"
+    base = DATA / "Proyecto_A_Caso2"
+    key = inputs_key(base, ["clients.csv", "vehicles.csv", "depots.csv",
+                            "parameters_urban.csv"], "caso2")
+    if inputs_cached(key):
+        print("Proyecto A — Caso 2 inputs up to date (arcs_cache cached).")
+        return
 
     # ---- 1. Leer datos origen ----
-    clients = pd.read_csv(base / "clients.csv")
-    vehicles = pd.read_csv(base / "vehicles.csv")
-    depots   = pd.read_csv(base / "depots.csv")
-    params   = pd.read_csv(base / "parameters_urban.csv")
+    clients = read_source(base / "clients.csv", "clients")
+    vehicles = read_source(base / "vehicles.csv", "vehicles")
+    depots   = read_source(base / "depots.csv", "depots")
+    params   = read_source(base / "parameters_urban.csv", "parameters")
 
     # params_urban: Parameter,Value,Unit,Description
     p = params.set_index("Parameter")["Value"]
@@ -230,11 +518,10 @@ def build_inputs_from_caso2():
         "light truck": 25.0,  # Promedio del rango 22-28
     }
 
-    def infer_eff(vtype: str) -> float:
-        key = str(vtype).strip().lower()
-        return eff_by_type.get(key, 30.0)
-
-    vehicles["fuel_eff_km_per_gal"] = vehicles["VehicleType"].apply(infer_eff)
+    vehicles["fuel_eff_km_per_gal"] = (
+        vehicles["VehicleType"].astype(str).str.strip().str.lower()
+        .map(eff_by_type).fillna(30.0).to_numpy()
+    )
 
     # Crear tabla interna
     vehicles_internal = pd.DataFrame({
@@ -263,59 +550,23 @@ def build_inputs_from_caso2():
         nodes_clients[["id", "lat", "lon"]]
     ], ignore_index=True)
 
-    nodes_dict = {row["id"]: (row["lat"], row["lon"]) for _, row in N.iterrows()}
-
-    arcs = []
     alpha = 1.0
 
-    for _, v in vehicles_internal.iterrows():
-        k = v["id"]
-        speed = float(v["speed_kph"])
-        eff_kmgal = float(v["fuel_eff_kmgal"])
-
-        for i, (lat1, lon1) in nodes_dict.items():
-            for j, (lat2, lon2) in nodes_dict.items():
-                if i == j:
-                    continue
-                d = haversine_km(lat1, lon1, lat2, lon2) * alpha
-                t = d / max(speed, 1e-6)
-                
-                fuel_cost = (d / eff_kmgal) * fuel_price
-                dist_cost = C_dist * d
-                time_cost = C_time * t
-                total = fuel_cost + dist_cost + time_cost
-
-                arcs.append({
-                    "vehicle": k,
-                    "from": i,
-                    "to": j,
-                    "dist_km": round(d, 3),
-                    "time_h": round(t, 3),
-                    "cost": round(total, 3),
-                    "fuel_cost": round(fuel_cost, 3),
-                    "dist_cost": round(dist_cost, 3),
-                    "time_cost": round(time_cost, 3),
-                    "allowed_pair": 1
-                })
-
-    arcs_df = pd.DataFrame(arcs)
+    arcs_df = build_arcs(N, vehicles_internal, "fuel_eff_kmgal", fuel_price,
+                         C_dist, C_time, alpha=alpha)
 
     # ---- 8. Guardar ----
-    INPUTS = ROOT / "inputs"
-    TABLES = ROOT / "outputs" / "tables"
-    INPUTS.mkdir(parents=True, exist_ok=True)
-    TABLES.mkdir(parents=True, exist_ok=True)
+    make_output_dirs()
 
     nodes_centers.to_csv(INPUTS / "nodes_centers.csv", index=False)
     nodes_clients.to_csv(INPUTS / "nodes_clients.csv", index=False)
     vehicles_internal.to_csv(INPUTS / "vehicles.csv", index=False)
     economics_internal.to_csv(INPUTS / "economics.csv", index=False)
-    arcs_df.to_csv(INPUTS / "arcs_cache.csv", index=False)
+    write_arcs_cache(arcs_df, INPUTS / "arcs_cache.csv")
 
-    nodes_centers.to_csv(TABLES / "nodes_centers.csv", index=False)
-    nodes_clients.to_csv(TABLES / "nodes_clients.csv", index=False)
-    arcs_df.to_csv(TABLES / "arcs_cache.csv", index=False)
+    mirror_to_tables("nodes_centers.csv", "nodes_clients.csv", "arcs_cache.csv")
 
+    store_inputs_key(key)
     print("Preprocessing for Proyecto A — Caso 2 (urbano) completed successfully.")
 
 
@@ -326,14 +577,18 @@ def build_inputs_from_caso3(max_clients=None):
     incluyendo una matriz de acceso basada en VehicleSizeRestriction.
     """
 
-    ROOT = Path(__file__).resolve().parents[1]
-    base = ROOT / "data" / "Proyecto_A_Caso3"
+    base = DATA / "Proyecto_A_Caso3"
+    key = inputs_key(base, ["clients.csv", "vehicles.csv", "depots.csv",
+                            "parameters_urban.csv"], "caso3", max_clients)
+    if inputs_cached(key, "access.csv"):
+        print("Caso 3 inputs up to date (arcs_cache cached).")
+        return
 
     # ---- 1. Leer datos origen ----
-    clients = pd.read_csv(base / "clients.csv")
-    vehicles = pd.read_csv(base / "vehicles.csv")
-    depots   = pd.read_csv(base / "depots.csv")
-    params   = pd.read_csv(base / "parameters_urban.csv")
+    clients = read_source(base / "clients.csv", "clients")
+    vehicles = read_source(base / "vehicles.csv", "vehicles")
+    depots   = read_source(base / "depots.csv", "depots")
+    params   = read_source(base / "parameters_urban.csv", "parameters")
 
     # Optional: limitar número de clientes para tests de escalabilidad
     if max_clients is not None:
@@ -367,7 +622,7 @@ def build_inputs_from_caso3(max_clients=None):
     })
 
     # Guardamos también VehicleSizeRestriction para la matriz de acceso
-    client_restr = clients.set_index("StandardizedID")["VehicleSizeRestriction"].to_dict()
+    client_restr = dict(zip(clients["StandardizedID"], clients["VehicleSizeRestriction"]))
 
     # ---- 4. Vehículos internos ----
     # vehicles.csv: VehicleID,StandardizedID,Capacity,Range,VehicleType
@@ -384,11 +639,10 @@ def build_inputs_from_caso3(max_clients=None):
 
     # Si en parameters_urban.csv vinieran eficiencias más finas, aquí se podrían mapear.
 
-    def infer_eff(vtype: str) -> float:
-        key = str(vtype).strip().lower()
-        return eff_by_type.get(key, 30.0)
-
-    vehicles_internal["fuel_eff_km_per_gal"] = vehicles_internal["VehicleType"].apply(infer_eff)
+    vehicles_internal["fuel_eff_km_per_gal"] = (
+        vehicles_internal["VehicleType"].astype(str).str.strip().str.lower()
+        .map(eff_by_type).fillna(30.0).to_numpy()
+    )
 
     vehicles_internal = pd.DataFrame({
         "id":             vehicles_internal["id"],
@@ -416,41 +670,11 @@ def build_inputs_from_caso3(max_clients=None):
         nodes_clients[["id", "lat", "lon"]]
     ], ignore_index=True)
 
-    nodes_dict = {row["id"]: (row["lat"], row["lon"]) for _, row in N.iterrows()}
-
-    arcs = []
     alpha = 1.0  # factor de rodeo urbano (1 = Haversine directo)
 
-    for _, v in vehicles_internal.iterrows():
-        k = v["id"]
-        speed = float(v["speed_kph"])
-        eff_kmgal = float(v["fuel_eff_kmgal"])
-
-        for i, (lat_i, lon_i) in nodes_dict.items():
-            for j, (lat_j, lon_j) in nodes_dict.items():
-                if i == j:
-                    continue
-
-                d = haversine_km(lat_i, lon_i, lat_j, lon_j) * alpha
-                t = d / speed if speed > 0 else 0.0
-
-                fuel_gal   = d / eff_kmgal if eff_kmgal > 0 else 0.0
-                fuel_cost  = fuel_gal * fuel_price
-                dist_cost  = d * C_dist
-                time_cost  = t * C_time
-                total      = fuel_cost + dist_cost + time_cost
-
-                arcs.append({
-                    "vehicle": k,
-                    "from": i,
-                    "to": j,
-                    "dist_km": round(d, 3),
-                    "time_h":  round(t, 3),
-                    "cost":    round(total, 3),
-                    "allowed_pair": 1
-                })
-
-    arcs_df = pd.DataFrame(arcs)
+    # velocidad / eficiencia no positivas -> tiempo / combustible 0
+    arcs_df = build_arcs(N, vehicles_internal, "fuel_eff_kmgal", fuel_price,
+                         C_dist, C_time, alpha=alpha, cost_detail=False)
 
     # ---- 7. Matriz de acceso usando VehicleSizeRestriction ----
     # VehicleSizeRestriction: máximo tipo permitido (small van, medium van, light truck)
@@ -460,55 +684,41 @@ def build_inputs_from_caso3(max_clients=None):
         "light truck": 3
     }
 
-    def rank_of_type(vtype: str) -> int:
-        return type_rank.get(str(vtype).strip().lower(), max(type_rank.values()))
-
-    access_rows = []
-
-    # Centros: permitimos cualquier vehículo
-    for _, dep in nodes_centers.iterrows():
-        node_id = dep["id"]
-        for _, v in vehicles_internal.iterrows():
-            access_rows.append({
-                "node": node_id,
-                "vehicle": v["id"],
-                "allowed": 1
-            })
-
-    # Clientes: restringimos según VehicleSizeRestriction
-    for _, cl in nodes_clients.iterrows():
-        node_id = cl["id"]
-        restr = client_restr.get(node_id, None)
-        if restr is None:
-            max_rank = max(type_rank.values())
-        else:
-            max_rank = rank_of_type(restr)
-
-        for _, v in vehicles_internal.iterrows():
-            vtype_rank = rank_of_type(v["VehicleType"])
-            allowed = 1 if vtype_rank <= max_rank else 0
-            access_rows.append({
-                "node": node_id,
-                "vehicle": v["id"],
-                "allowed": allowed
-            })
-
-    access_df = pd.DataFrame(access_rows)
+    max_rank = max(type_rank.values())
+
+    def rank_of_type(vtypes: pd.Series) -> np.ndarray:
+        # tipo desconocido o faltante -> rango máximo
+        return (vtypes.astype(str).str.strip().str.lower()
+                .map(type_rank).fillna(max_rank).to_numpy())
+
+    veh_rank = rank_of_type(vehicles_internal["VehicleType"])            # (V,)
+    client_max = rank_of_type(nodes_clients["id"].map(client_restr))      # (Nc,)
+
+    # Centros: cualquier vehículo; clientes: según VehicleSizeRestriction
+    allowed = np.vstack([
+        np.ones((len(nodes_centers), len(veh_rank)), dtype=np.int8),
+        (veh_rank[None, :] <= client_max[:, None]).astype(np.int8),
+    ])
+    node_ids = np.concatenate([nodes_centers["id"].to_numpy(dtype=object),
+                               nodes_clients["id"].to_numpy(dtype=object)])
+    access_df = pd.DataFrame({
+        "node":    np.repeat(node_ids, len(veh_rank)),
+        "vehicle": np.tile(vehicles_internal["id"].to_numpy(dtype=object), len(node_ids)),
+        "allowed": allowed.ravel(),
+    })
 
     # ---- 8. Guardar en inputs/ y outputs/tables/ ----
-    INPUTS = ROOT / "inputs"
-    TABLES = ROOT / "outputs" / "tables"
-    INPUTS.mkdir(parents=True, exist_ok=True)
-    TABLES.mkdir(parents=True, exist_ok=True)
+    make_output_dirs()
 
     nodes_centers.to_csv(INPUTS / "nodes_centers.csv", index=False)
     nodes_clients.to_csv(INPUTS / "nodes_clients.csv", index=False)
     vehicles_internal.to_csv(INPUTS / "vehicles.csv", index=False)
     economics_internal.to_csv(INPUTS / "economics.csv", index=False)
-    arcs_df.to_csv(INPUTS / "arcs_cache.csv", index=False)
-    arcs_df.to_csv(TABLES / "arcs_cache.csv", index=False)
+    write_arcs_cache(arcs_df, INPUTS / "arcs_cache.csv")
+    mirror_to_tables("arcs_cache.csv")
     access_df.to_csv(INPUTS / "access.csv", index=False)
 
+    store_inputs_key(key)
     print("Caso 3 inputs built successfully.")
 
 
@@ -1,18 +1,11 @@
 
 # -*- coding: utf-8 -*-
-import math
 import json
 from pathlib import Path
 import pandas as pd
 import numpy as np
 
-def haversine_km(lat1, lon1, lat2, lon2, R=6371.0):
-    phi1 = math.radians(lat1); phi2 = math.radians(lat2)
-    dphi = math.radians(lat2-lat1)
-    dlambda = math.radians(lon2-lon1)
-    a = (math.sin(dphi/2)**2 + 
-         math.cos(phi1)*math.cos(phi2)*math.sin(dlambda/2)**2)
-    return 2*R*math.asin(math.sqrt(a))
+from pipelines.preprocess import categorical_ids, haversine_matrix_km, write_arcs_cache
 
 def build_data(data_dir:str):
     data_dir = Path(data_dir)
@@ -37,54 +30,53 @@ def build_data(data_dir:str):
     nodes_i["type"]="I"
     nodes = pd.concat([nodes_c, nodes_i], ignore_index=True)
 
-    # Diccionarios de coords
-    coords = nodes.set_index("id")[["lat","lon"]].to_dict(orient="index")
+    # Todas las parejas i != j (matriz de distancias en una sola pasada)
+    ids = nodes["id"].to_numpy()
+    # haversine_matrix_km usa R = 6371; se reescala al radio de global.json
+    D = haversine_matrix_km(nodes["lat"].to_numpy(), nodes["lon"].to_numpy()) * (R / 6371.0) * alpha
+    ii, jj = np.nonzero(~np.eye(len(ids), dtype=bool))
+    arcs_df = pd.DataFrame({"dist_km": D[ii, jj]})
 
-    # Todas las parejas i != j
-    pairs = []
-    for i in nodes["id"]:
-        for j in nodes["id"]:
-            if i==j: 
-                continue
-            lat1, lon1 = coords[i]["lat"], coords[i]["lon"]
-            lat2, lon2 = coords[j]["lat"], coords[j]["lon"]
-            dist = haversine_km(lat1, lon1, lat2, lon2, R=R) * alpha
-            pairs.append((i,j,dist))
-    arcs_df = pd.DataFrame(pairs, columns=["from","to","dist_km"])
+    # Expandir por vehículo: matrices (arcos x vehículos) con los parámetros
+    # de cada vehículo como vectores, aplanadas en orden arco-vehículo
+    vk = vehicles.set_index("id")
+    vid = vk.index.to_numpy()
+    speed = np.maximum(1e-6, vk["speed_kph"].to_numpy(dtype=float))
+    eff = np.maximum(1e-6, vk["fuel_eff_kmpl"].to_numpy(dtype=float))
+    price = vk["fuel_price_per_l"].to_numpy(dtype=float)
+    cost_hour = vk["cost_hour"].to_numpy(dtype=float)
+    dist = arcs_df["dist_km"].to_numpy(dtype=float)[:, None]
+    time_h = dist / speed[None, :]
+    fuel_cost = (dist / eff[None, :]) * price[None, :]
+    time_cost = time_h * cost_hour[None, :]
+    nK = len(vid)
+    v_code = np.tile(np.arange(nK), len(arcs_df))
+    i_code, j_code = np.repeat(ii, nK), np.repeat(jj, nK)
+    # ids como categóricas (códigos enteros): filtros sin hash de str
+    arcs_cache = pd.DataFrame({
+        "vehicle": categorical_ids(v_code, vid),
+        "from": categorical_ids(i_code, ids),
+        "to": categorical_ids(j_code, ids),
+        "dist_km": np.repeat(arcs_df["dist_km"].to_numpy(), nK),
+        "time_h": time_h.ravel(),
+        "cost": (fuel_cost + time_cost).ravel(),
+    })
 
-    # Expandir por vehículo y computar tiempos/costos
-    veh_params = vehicles.set_index("id")
-
-    def row_expand(row):
-        out = []
-        for k in veh_params.index:
-            speed = float(veh_params.loc[k,"speed_kph"])
-            eff = float(veh_params.loc[k,"fuel_eff_kmpl"])
-            price = float(veh_params.loc[k,"fuel_price_per_l"])
-            cost_hour = float(veh_params.loc[k,"cost_hour"])
-            time_h = row["dist_km"] / max(1e-6, speed)
-            fuel_cost = (row["dist_km"]/max(1e-6, eff)) * price
-            time_cost = time_h * cost_hour
-            cost = fuel_cost + time_cost
-            out.append((k, row["from"], row["to"], row["dist_km"], time_h, cost))
-        return out
-
-    expanded = []
-    for _, r in arcs_df.iterrows():
-        expanded.extend(row_expand(r))
-    arcs_cache = pd.DataFrame(expanded, columns=["vehicle","from","to","dist_km","time_h","cost"])
-
-    # Aplicar matriz de acceso: invalidar (from,to) si algún extremo no es permitido para ese vehículo
-    # (Esto se filtra en el modelo con x <= A_{i,k} y x <= A_{j,k}; aquí no eliminamos filas, solo dejamos info)
-    access_idx = access.set_index(["node","vehicle"])["allowed"].to_dict()
-    def allowed_endpoints(v, i, j):
-        ai = access_idx.get((i,v), 1)
-        aj = access_idx.get((j,v), 1)
-        return int(ai and aj)
-    arcs_cache["allowed_pair"] = arcs_cache.apply(lambda r: allowed_endpoints(r["vehicle"], r["from"], r["to"]), axis=1)
+    # Aplicar matriz de acceso: descartar (from,to) si algún extremo no es permitido para ese vehículo
+    # (el modelo no crea variables para esos arcos; allowed_pair queda en 1 como en pipelines/preprocess)
+    # A_mat[nodo, vehículo] se arma una vez (pares ausentes = permitido) y se indexa por códigos
+    acc = access[["node","vehicle","allowed"]].drop_duplicates(["node","vehicle"], keep="last")
+    a_node = pd.Index(ids).get_indexer(acc["node"])
+    a_veh = pd.Index(vid).get_indexer(acc["vehicle"])
+    known = (a_node >= 0) & (a_veh >= 0)
+    A_mat = np.ones((len(ids), nK), dtype=np.int8)
+    A_mat[a_node[known], a_veh[known]] = acc["allowed"].to_numpy()[known] != 0
+    arcs_cache["allowed_pair"] = (A_mat[i_code, v_code] & A_mat[j_code, v_code]).astype(int)
+    arcs_cache = arcs_cache[arcs_cache["allowed_pair"] == 1].reset_index(drop=True)
 
     # Persistir
-    arcs_cache.to_csv(out_tables/"arcs_cache.csv", index=False)
+    # CSV + copia Parquet (la que leen el modelo y solve_and_export)
+    write_arcs_cache(arcs_cache, out_tables/"arcs_cache.csv")
 
     # Devolver para depuración
     return {
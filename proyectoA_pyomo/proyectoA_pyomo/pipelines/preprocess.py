@@ -4,20 +4,32 @@
 # - Reads inputs in proyectoA_pyomo/inputs
 # - Writes arcs.csv and copies nodes_* to outputs/tables
 # - Computes distances (Haversine * alpha) and times based on a default speed profile
-import math, os
+import os
+import numpy as np
 import pandas as pd
 
+# scikit-learn is optional: its haversine_distances is compiled C
+try:
+    from sklearn.metrics.pairwise import haversine_distances
+except ImportError:
+    haversine_distances = None
+
 ROOT = os.path.dirname(os.path.dirname(__file__))
 INP = os.path.join(ROOT, "inputs")
 OUT_TAB = os.path.join(ROOT, "outputs", "tables")
 
-def haversine(lat1, lon1, lat2, lon2):
+def haversine_matrix(lat, lon):
+    """N x N haversine distances (km) between all points (sklearn if installed, else broadcasting)."""
     R = 6371.0
-    phi1, phi2 = math.radians(lat1), math.radians(lat2)
-    dphi = math.radians(lat2-lat1)
-    dl = math.radians(lon2-lon1)
-    a = math.sin(dphi/2)**2 + math.cos(phi1)*math.cos(phi2)*math.sin(dl/2)**2
-    return 2*R*math.asin(math.sqrt(a))
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    if haversine_distances is not None:
+        return haversine_distances(np.radians(np.column_stack([lat, lon]))) * R
+    phi = np.radians(lat)
+    dphi = np.radians(lat[None, :] - lat[:, None])
+    dl = np.radians(lon[None, :] - lon[:, None])
+    a = np.sin(dphi/2)**2 + np.cos(phi)[:, None]*np.cos(phi)[None, :]*np.sin(dl/2)**2
+    return 2*R*np.arcsin(np.sqrt(a))
 
 def run(alpha=1.25, v_kmh=25.0):
     os.makedirs(OUT_TAB, exist_ok=True)
@@ -28,17 +40,21 @@ def run(alpha=1.25, v_kmh=25.0):
         alpha = float(econ["alpha"].iloc[0])
 
     nodes = pd.concat([centers[["id","lat","lon"]], clients[["id","lat","lon"]]], ignore_index=True)
-    # full digraph except self-loops
-    arcs=[]
-    for i in range(len(nodes)):
-        for j in range(len(nodes)):
-            if i==j: continue
-            ni, nj = nodes.iloc[i], nodes.iloc[j]
-            d = haversine(ni.lat, ni.lon, nj.lat, nj.lon)*alpha
-            t = d / v_kmh
-            arcs.append({"i":ni.id,"j":nj.id,"dist":d,"time":t,"habilitado":1})
-    arcs_df = pd.DataFrame(arcs)
+    # full digraph except self-loops, one distance matrix for all pairs
+    ids = nodes["id"].to_numpy()
+    D = haversine_matrix(nodes["lat"], nodes["lon"])*alpha
+    ii, jj = np.nonzero(~np.eye(len(ids), dtype=bool))
+    d = D[ii, jj]
+    arcs_df = pd.DataFrame({"i": ids[ii], "j": ids[jj], "dist": d, "time": d / v_kmh,
+                            "habilitado": 1})
     arcs_df.to_csv(os.path.join(OUT_TAB,"arcs.csv"), index=False)
+    # parquet copy for run_full.py (typed, columnar); CSV stays for the report
+    pq_path = os.path.join(OUT_TAB,"arcs.parquet")
+    try:
+        arcs_df.to_parquet(pq_path, index=False)
+    except ImportError:
+        if os.path.exists(pq_path):
+            os.remove(pq_path)   # never leave a stale copy behind
     centers.to_csv(os.path.join(OUT_TAB,"nodes_centers.csv"), index=False)
     clients.to_csv(os.path.join(OUT_TAB,"nodes_clients.csv"), index=False)
 
@@ -15,9 +15,16 @@ def read_inputs():
     vehicles = pd.read_csv(os.path.join(INP,"vehicles.csv"))
     econ = pd.read_csv(os.path.join(INP,"economics.csv"))
     access = pd.read_csv(os.path.join(INP,"access.csv"))
-    arcs = pd.read_csv(os.path.join(ROOT,"outputs","tables","arcs.csv")) \
-            if os.path.exists(os.path.join(ROOT,"outputs","tables","arcs.csv")) \
-            else None
+    # prefer the parquet copy written by pipelines/preprocess.py, unless it is
+    # older than arcs.csv (left over from an earlier run)
+    csv_path = os.path.join(ROOT,"outputs","tables","arcs.csv")
+    pq_path = os.path.join(ROOT,"outputs","tables","arcs.parquet")
+    arcs = None
+    if os.path.exists(pq_path) and (not os.path.exists(csv_path)
+                                    or os.path.getmtime(pq_path) >= os.path.getmtime(csv_path)):
+        arcs = pd.read_parquet(pq_path)
+    elif os.path.exists(csv_path):
+        arcs = pd.read_csv(csv_path)
     return centers, clients, vehicles, econ, access, arcs
 
 def to_data(centers, clients, vehicles, econ, access, arcs):
@@ -32,21 +39,40 @@ def to_data(centers, clients, vehicles, econ, access, arcs):
         raise RuntimeError("arcs.csv not found. Run pipelines/preprocess.py first.")
     A = list(zip(arcs["i"], arcs["j"]))
     data['A'] = A
-    data['dist'] = {(r.i, r.j): float(r.dist) for _,r in arcs.iterrows()}
-    data['time'] = {(r.i, r.j): float(r.time) for _,r in arcs.iterrows()}
+    data['dist'] = dict(zip(A, arcs["dist"].astype(float).tolist()))
+    data['time'] = dict(zip(A, arcs["time"].astype(float).tolist()))
 
-    data['q'] = {r.id: float(r.q) for _,r in clients.iterrows()}
-    data['cap_c'] = {r.id: float(r.cap_c) for _,r in centers.iterrows()}
+    data['q'] = dict(zip(I, clients["q"].astype(float).tolist()))
+    data['cap_c'] = dict(zip(C, centers["cap_c"].astype(float).tolist()))
 
-    data['Q'] = {r.id: float(r.Q) for _,r in vehicles.iterrows()}
-    data['A_access'] = {(row.node_id,row.veh_id): int(row.allowed) for _,row in access.iterrows()}
+    def per_vehicle(col):
+        return dict(zip(K, vehicles[col].astype(float).tolist()))
+
+    data['Q'] = per_vehicle("Q")
+    data['A_access'] = dict(zip(zip(access["node_id"], access["veh_id"]),
+                                access["allowed"].astype(int).tolist()))
     data['fuel_price'] = float(econ["fuel_price"].iloc[0])
-    data['eff_k'] = {r.id: float(r.eff) for _,r in vehicles.iterrows()}
-    data['w_time'] = {r.id: float(r.w_time) for _,r in vehicles.iterrows()}
-    data['c_km'] = {r.id: float(r.c_km) for _,r in vehicles.iterrows()}
-    data['f_fixed'] = {r.id: float(r.f_fixed) for _,r in vehicles.iterrows()}
-    data['range_k'] = {r.id: float(r.R) for _,r in vehicles.iterrows()}
-    data['Tmax_k'] = {r.id: float(r.Tmax) for _,r in vehicles.iterrows()}
+    data['eff_k'] = per_vehicle("eff")
+    data['w_time'] = per_vehicle("w_time")
+    data['c_km'] = per_vehicle("c_km")
+    data['f_fixed'] = per_vehicle("f_fixed")
+    data['range_k'] = per_vehicle("R")
+    data['Tmax_k'] = per_vehicle("Tmax")
+
+    # (k,i,j) with urban access at both ends; other arcs get no x/y at all.
+    # A (node, vehicle) pair missing from access.csv counts as allowed
+    denied = {key for key, a in data['A_access'].items() if a < 1}
+    data['KA'] = [(k, i, j) for k in K for (i, j) in A
+                  if (i, k) not in denied and (j, k) not in denied]
+
+    # Arc cost per (k,i,j), all data: fuel + time + km, broadcast over K x A
+    dist = arcs["dist"].to_numpy(dtype=float)[None, :]
+    tt = arcs["time"].to_numpy(dtype=float)[None, :]
+    eff = vehicles["eff"].to_numpy(dtype=float)[:, None]
+    w_time = vehicles["w_time"].to_numpy(dtype=float)[:, None]
+    c_km = vehicles["c_km"].to_numpy(dtype=float)[:, None]
+    cost = data['fuel_price'] * dist / (eff+1e-9) + w_time * tt + c_km * dist
+    data['arc_cost'] = dict(zip(((k, i, j) for k in K for (i, j) in A), cost.ravel().tolist()))
     return data
 
 def export_solution(m):
@@ -58,6 +84,9 @@ def export_solution(m):
     sel=[]; flows=[]; ckp=[]; vkp=[]
     for k in m.K:
         for (i,j) in m.A:
+            if (k,i,j) not in m.KA:
+                flows.append({"vehicle":k,"i":i,"j":j,"flow":0.0})
+                continue
             if value(m.x[k,i,j])>0.5:
                 sel.append({"vehicle":k,"i":i,"j":j,
                             "dist_km":value(m.dist[i,j]),"time_h":value(m.tt[i,j]),
@@ -66,9 +95,10 @@ def export_solution(m):
     for c in m.C:
         ckp.append({"center":c,"supply":value(m.s[c]),"cap":value(m.cap_c[c])})
     for k in m.K:
-        dist = sum(value(m.dist[i,j])*value(m.x[k,i,j]) for (i,j) in m.A)
-        ttot = sum(value(m.tt[i,j])*value(m.x[k,i,j]) for (i,j) in m.A)
-        load = sum(value(m.y[k,i,j]) for (i,j) in m.A)
+        arcs_k = [(i,j) for (kk,i,j) in m.KA if kk==k]
+        dist = sum(value(m.dist[i,j])*value(m.x[k,i,j]) for (i,j) in arcs_k)
+        ttot = sum(value(m.tt[i,j])*value(m.x[k,i,j]) for (i,j) in arcs_k)
+        load = sum(value(m.y[k,i,j]) for (i,j) in arcs_k)
         vkp.append({"vehicle":k,"active":int(value(m.u[k])>0.5),
                     "dist_used_km":dist,"R_km":value(m.R[k]),
                     "time_used_h":ttot,"Tmax_h":value(m.Tmax[k]),
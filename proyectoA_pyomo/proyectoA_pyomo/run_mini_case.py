@@ -3,9 +3,16 @@
 # Produces ALL CSV outputs required by the LaTeX, without relying on external solvers.
 # - reads inputs from proyectoA_pyomo/inputs
 # - writes outputs to proyectoA_pyomo/outputs/tables and report/assets
-import os, math, itertools
+import os, itertools
+import numpy as np
 import pandas as pd
 
+# scikit-learn is optional: its haversine_distances is compiled C
+try:
+    from sklearn.metrics.pairwise import haversine_distances
+except ImportError:
+    haversine_distances = None
+
 ROOT = os.path.dirname(__file__)
 INP = os.path.join(ROOT, "inputs")
 OUT_TAB = os.path.join(ROOT, "outputs", "tables")
@@ -21,61 +28,53 @@ access = pd.read_csv(os.path.join(INP,"access.csv"))
 fuel_price = float(econ["fuel_price"].iloc[0])
 
 # Build arc table quickly from coordinates (same as preprocess but small)
-def haversine(lat1, lon1, lat2, lon2):
+def haversine_matrix(lat, lon):
     R = 6371.0
-    phi1, phi2 = math.radians(lat1), math.radians(lat2)
-    dphi = math.radians(lat2-lat1)
-    dl = math.radians(lon2-lon1)
-    a = math.sin(dphi/2)**2 + math.cos(phi1)*math.cos(phi2)*math.sin(dl/2)**2
-    return 2*R*math.asin(math.sqrt(a))
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    if haversine_distances is not None:
+        return haversine_distances(np.radians(np.column_stack([lat, lon]))) * R
+    phi = np.radians(lat)
+    dphi = np.radians(lat[None, :] - lat[:, None])
+    dl = np.radians(lon[None, :] - lon[:, None])
+    a = np.sin(dphi/2)**2 + np.cos(phi)[:, None]*np.cos(phi)[None, :]*np.sin(dl/2)**2
+    return 2*R*np.arcsin(np.sqrt(a))
 
 alpha = float(econ.get("alpha", pd.Series([1.25])).iloc[0])
 
 nodes = pd.concat([centers[["id","lat","lon"]], clients[["id","lat","lon"]]], ignore_index=True)
-id2coord = {r.id:(r.lat, r.lon) for _,r in nodes.iterrows()}
-
-arcs = {}
-for i in id2coord:
-    for j in id2coord:
-        if i==j: continue
-        (la,lo),(lb,lblo)=id2coord[i], id2coord[j]
-        d = haversine(la,lo,lb,lblo)*alpha
-        t = d/25.0  # 25 km/h
-        arcs[(i,j)] = {"dist":d, "time":t}
+ids = nodes["id"].tolist()
+D = haversine_matrix(nodes["lat"], nodes["lon"])*alpha
+T = D/25.0  # 25 km/h
 
-# Access map
-acc = {(row.node_id, row.veh_id): int(row.allowed) for _,row in access.iterrows()}
+node_idx = {nid: a for a, nid in enumerate(ids)}   # node id -> row/col of D, T
 
 # Data helpers
 C = list(centers["id"])
 I = list(clients["id"])
 K = list(vehicles["id"])
-q = {r.id: float(r.q) for _,r in clients.iterrows()}
-cap_c = {r.id: float(r.cap_c) for _,r in centers.iterrows()}
+q = dict(zip(I, clients["q"].astype(float).tolist()))
+cap_c = dict(zip(C, centers["cap_c"].astype(float).tolist()))
 
 veh = {}
-for _,r in vehicles.iterrows():
+for r in vehicles.itertuples(index=False):
     veh[r.id] = dict(Q=float(r.Q), R=float(r.R), eff=float(r.eff),
                      w_time=float(r.w_time), c_km=float(r.c_km),
                      f_fixed=float(r.f_fixed), Tmax=float(r.Tmax))
 
-# Feasible partitions of clients into vehicles (tiny set -> brute force)
-def partitions(lst, k):
-    # yield dict: veh_id -> list_of_clients
-    for grouping in itertools.product(range(k), repeat=len(lst)):
-        buckets = {i:[] for i in range(k)}
-        for cidx, b in enumerate(grouping):
-            buckets[b].append(lst[cidx])
-        yield buckets
+# Access matrix Acc[node, vehicle] (missing pairs are allowed)
+kidx = {k: b for b, k in enumerate(K)}
+Acc = np.ones((len(ids), len(K)), dtype=bool)
+known = access["node_id"].isin(node_idx) & access["veh_id"].isin(kidx)
+Acc[access.loc[known, "node_id"].map(node_idx).to_numpy(),
+    access.loc[known, "veh_id"].map(kidx).to_numpy()] = access.loc[known, "allowed"].to_numpy() != 0
 
 best = None
 
 def route_cost(route, k):
     # route like [CD, c1, c2, ..., CD]
-    tot_dist=0.0; tot_time=0.0
-    for i,j in zip(route[:-1], route[1:]):
-        a = arcs[(i,j)]
-        tot_dist += a["dist"]; tot_time += a["time"]
+    ri = np.array([node_idx[c] for c in route])
+    tot_dist = float(D[ri[:-1], ri[1:]].sum()); tot_time = float(T[ri[:-1], ri[1:]].sum())
     fuel = fuel_price * (tot_dist / (veh[k]["eff"]+1e-9))
     timec = veh[k]["w_time"] * tot_time
     kmc   = veh[k]["c_km"] * tot_dist
@@ -87,49 +86,103 @@ def all_permutations(clients_sub):
     return itertools.permutations(clients_sub)
 
 CD = C[0]  # single center in the mini-case
-
-for assign in partitions(I, len(K)):
-    # Capacity and access feasibility quick check
-    ok_assign = True
-    for idx,k in enumerate(K):
-        assigned = assign[idx]
-        if sum(q[c] for c in assigned) > veh[k]["Q"] + 1e-9:
-            ok_assign = False; break
-    if not ok_assign:
-        continue
-
-    # Build routes and compute cost
+n = len(I)
+pos = [node_idx[CD]] + [node_idx[c] for c in I]   # 0 = CD, 1..n = clients
+
+def best_route_scan(clients_sub, k):
+    # exhaustive fallback over permutations (range/jornada-aware)
+    best_k = None
+    for perm in all_permutations(clients_sub):
+        route = [CD] + list(perm) + [CD]
+        cost,dist,time = route_cost(route, k)
+        if dist > veh[k]["R"] + 1e-9: 
+            continue
+        if time > veh[k]["Tmax"] + 1e-9:
+            continue
+        if best_k is None or cost < best_k[0]:
+            best_k = (cost, route, dist, time)
+    return best_k
+
+def held_karp(k):
+    """
+    Cheapest CD -> clients -> CD route of vehicle k for every client subset
+    (bitmask over I), by Held-Karp DP on arc costs. Returns a list indexed by
+    mask with (cost, route, dist, time), or None if the subset is infeasible
+    (capacity, access, range or jornada).
+    """
+    v = veh[k]
+    sub = np.ix_(pos, pos)
+    W = fuel_price*(D[sub]/(v["eff"]+1e-9)) + v["w_time"]*T[sub] + v["c_km"]*D[sub]
+    W = W.tolist()
+    inf = float("inf")
+    # dp[mask][last]: cheapest path CD -> ... -> client `last`, visiting mask
+    dp = [[inf]*n for _ in range(1<<n)]
+    parent = [[-1]*n for _ in range(1<<n)]
+    for j in range(n):
+        dp[1<<j][j] = W[0][j+1]
+    for mask in range(1, 1<<n):
+        row = dp[mask]
+        for last in range(n):
+            c0 = row[last]
+            if c0 == inf:
+                continue
+            for nxt in range(n):
+                if mask & (1<<nxt):
+                    continue
+                nm = mask | (1<<nxt)
+                c = c0 + W[last+1][nxt+1]
+                if c < dp[nm][nxt]:
+                    dp[nm][nxt] = c; parent[nm][nxt] = last
+
+    out = [None]*(1<<n)
+    out[0] = (0.0, [CD, CD], 0.0, 0.0)
+    ok = Acc[pos, kidx[k]]
+    for mask in range(1, 1<<n):
+        members = [I[j] for j in range(n) if mask & (1<<j)]
+        if not ok[0] or not all(ok[j+1] for j in range(n) if mask & (1<<j)):
+            continue
+        if sum(q[c] for c in members) > v["Q"] + 1e-9:
+            continue
+        last = min(range(n), key=lambda j: dp[mask][j] + W[j+1][0] if mask & (1<<j) else inf)
+        seq = []; m = mask
+        while last >= 0:
+            seq.append(I[last])
+            m, last = m ^ (1<<last), parent[m][last]
+        route = [CD] + seq[::-1] + [CD]
+        cost,dist,time = route_cost(route, k)
+        if dist > v["R"] + 1e-9 or time > v["Tmax"] + 1e-9:
+            # the cheapest tour breaks range/jornada: a costlier one may not
+            out[mask] = best_route_scan(members, k)
+        else:
+            out[mask] = (cost, route, dist, time)
+    return out
+
+routes = {k: held_karp(k) for k in K}
+
+# Assign clients to vehicles (one subset per vehicle) using the DP tables,
+# pruning partial assignments that already cost more than the incumbent
+for grouping in itertools.product(range(len(K)), repeat=n):
+    masks = [0]*len(K)
+    for cidx, b in enumerate(grouping):
+        masks[b] |= 1<<cidx
     total_cost=0.0; details=[]
     feasible=True
     for idx,k in enumerate(K):
-        assigned = assign[idx]
-        if not assigned:
+        if not masks[idx]:
             # inactive vehicle: only fixed cost if we count activation; here activate only if used
             continue
-        best_k = None
-        for perm in all_permutations(assigned):
-            route = [CD] + list(perm) + [CD]
-            # access feasibility
-            access_ok = True
-            for i,j in zip(route[:-1], route[1:]):
-                if (i,k) in acc and acc[(i,k)]==0: access_ok=False; break
-                if (j,k) in acc and acc[(j,k)]==0: access_ok=False; break
-            if not access_ok: 
-                continue
-            cost,dist,time = route_cost(route, k)
-            if dist > veh[k]["R"] + 1e-9: 
-                continue
-            if time > veh[k]["Tmax"] + 1e-9:
-                continue
-            if best_k is None or cost < best_k[0]:
-                best_k = (cost, route, dist, time)
+        best_k = routes[k][masks[idx]]
         if best_k is None:
             feasible=False; break
         total_cost += best_k[0] + veh[k]["f_fixed"]
+        if best is not None and total_cost >= best[0]:
+            feasible=False; break
+        assigned = [I[j] for j in range(n) if masks[idx] & (1<<j)]
         details.append((k, best_k[1], best_k[0], best_k[2], best_k[3], sum(q[c] for c in assigned)))
     if not feasible:
         continue
     if (best is None) or (total_cost < best[0]):
+        assign = {idx: [I[j] for j in range(n) if masks[idx] & (1<<j)] for idx in range(len(K))}
         best = (total_cost, details, assign)
 
 # Export outputs
@@ -146,15 +199,15 @@ center_rows.append({"center":CD,"supply":total_supply,"cap":cap_c[CD]})
 for (k, route, cost, dist, time, load_sum) in details:
     # Selected arcs
     for i,j in zip(route[:-1], route[1:]):
-        a = arcs[(i,j)]
-        sel_rows.append({"vehicle":k,"i":i,"j":j,"dist_km":a["dist"],"time_h":a["time"],"flow":0.0})
+        dist_ij, time_ij = float(D[node_idx[i], node_idx[j]]), float(T[node_idx[i], node_idx[j]])
+        sel_rows.append({"vehicle":k,"i":i,"j":j,"dist_km":dist_ij,"time_h":time_ij,"flow":0.0})
 
         # mini-case arc costs
-        fuel = fuel_price * (a["dist"]/(veh[k]["eff"]+1e-9))
-        timec = veh[k]["w_time"]*a["time"]
-        kmc = veh[k]["c_km"]*a["dist"]
+        fuel = fuel_price * (dist_ij/(veh[k]["eff"]+1e-9))
+        timec = veh[k]["w_time"]*time_ij
+        kmc = veh[k]["c_km"]*dist_ij
         mini_arcos.append({
-            "vehicle":k,"i":i,"j":j,"dist_km":a["dist"],"time_h":a["time"],
+            "vehicle":k,"i":i,"j":j,"dist_km":dist_ij,"time_h":time_ij,
             "fuel_cost":fuel,"time_cost":timec,"km_cost":kmc,"total_cost":fuel+timec+kmc
         })
 
@@ -163,7 +216,6 @@ for (k, route, cost, dist, time, load_sum) in details:
     flow_by_arc=[]
     current_load = sum(remaining.values())
     for i,j in zip(route[:-1], route[1:]):
-        a = arcs[(i,j)]
         flow_by_arc.append((i,j,current_load))
         if j in remaining:
             current_load -= remaining[j]  # delivered at arrival to client
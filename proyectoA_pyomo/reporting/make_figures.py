@@ -1,7 +1,15 @@
 # -*- coding: utf-8 -*-
+import functools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+import numpy as np
 import pandas as pd
+import matplotlib
+matplotlib.use("Agg")   # sólo se escriben PNG: sin backend interactivo
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
 import seaborn as sns
 
 # Configuración de estilo
@@ -10,55 +18,38 @@ plt.rcParams['figure.dpi'] = 300
 plt.rcParams['savefig.dpi'] = 300
 plt.rcParams['font.size'] = 10
 
-def make_all_figures(data_dir: str):
-    """
-    Genera todas las figuras de análisis para un caso específico.
-    
-    Args:
-        data_dir: Ruta al directorio raíz del proyecto
-    """
-    data_dir = Path(data_dir)
-    out_fig = data_dir / "outputs" / "figures"
-    out_fig.mkdir(parents=True, exist_ok=True)
+@functools.lru_cache(maxsize=32)
+def _read_csv_cached(path: str, mtime: float) -> pd.DataFrame:
+    """pd.read_csv memoizado por (ruta, mtime): un CSV modificado se relee."""
+    return pd.read_csv(path)
 
-    # ====================================================================
-    # LECTURA DE DATOS (RUTAS CORREGIDAS)
-    # ====================================================================
-    
-    # Leer desde inputs/ (datos preprocesados)
-    centers = pd.read_csv(data_dir / "inputs" / "nodes_centers.csv")
-    clients = pd.read_csv(data_dir / "inputs" / "nodes_clients.csv")
-    
-    # Leer desde outputs/tables/ (resultados del solver)
-    arcs = pd.read_csv(data_dir / "outputs" / "tables" / "selected_arcs_detailed.csv")
-    flows = pd.read_csv(data_dir / "outputs" / "tables" / "flows_by_arc_per_vehicle.csv")
-    center_kpis = pd.read_csv(data_dir / "outputs" / "tables" / "center_kpis.csv")
-    vehicle_kpis = pd.read_csv(data_dir / "outputs" / "tables" / "vehicle_kpis.csv")
 
-    # Coordenadas de todos los nodos
-    coord = pd.concat([
-        centers[["id", "lat", "lon"]],
-        clients[["id", "lat", "lon"]]
-    ]).set_index("id")
+def _read_csv(path: Path) -> pd.DataFrame:
+    """
+    Lee `path` una sola vez por proceso mientras no cambie en disco. Devuelve
+    una copia: las figuras agregan columnas y no deben tocar la versión en caché.
+    """
+    return _read_csv_cached(str(path), path.stat().st_mtime).copy()
 
-    print(f" Generando figuras en: {out_fig}")
 
-    # ====================================================================
-    # FIGURA 1: MAPA DE NODOS
-    # ====================================================================
+def _fig_01_nodes(out_fig, save_kw, node_ids, lonlat, n_centers, **_):
+    """Mapa de nodos (01_nodes.png)."""
     fig, ax = plt.subplots(figsize=(12, 8))
     
-    ax.scatter(centers["lon"], centers["lat"], s=200, marker="s", 
+    c_xy, i_xy = lonlat[:n_centers], lonlat[n_centers:]
+    c_ids, i_ids = node_ids[:n_centers].to_numpy(), node_ids[n_centers:].to_numpy()
+
+    ax.scatter(c_xy[:, 0], c_xy[:, 1], s=200, marker="s", 
                color='red', label="Centros de Distribución", zorder=3, edgecolors='black', linewidth=2)
-    ax.scatter(clients["lon"], clients["lat"], s=80, marker="o", 
+    ax.scatter(i_xy[:, 0], i_xy[:, 1], s=80, marker="o", 
                color='steelblue', label="Clientes", zorder=2, alpha=0.7)
     
     # Etiquetas
-    for _, r in centers.iterrows():
-        ax.text(r["lon"], r["lat"], r["id"], fontsize=10, fontweight='bold',
+    for (lon, lat), nid in zip(c_xy, c_ids):
+        ax.text(lon, lat, nid, fontsize=10, fontweight='bold',
                 ha='center', va='bottom', bbox=dict(boxstyle='round', facecolor='yellow', alpha=0.7))
-    for _, r in clients.iterrows():
-        ax.text(r["lon"], r["lat"], r["id"], fontsize=7, ha='center', va='bottom')
+    for (lon, lat), nid in zip(i_xy, i_ids):
+        ax.text(lon, lat, nid, fontsize=7, ha='center', va='bottom')
     
     ax.set_xlabel("Longitud", fontsize=12)
     ax.set_ylabel("Latitud", fontsize=12)
@@ -66,35 +57,45 @@ def make_all_figures(data_dir: str):
     ax.legend(fontsize=11, loc='best')
     ax.grid(True, alpha=0.3)
     
-    fig.savefig(out_fig / "01_nodes.png", bbox_inches="tight")
+    fig.savefig(out_fig / "01_nodes.png", **save_kw)
     plt.close(fig)
-    print("01_nodes.png")
+    return "01_nodes.png"
 
-    # ====================================================================
-    # FIGURA 2: RUTAS POR VEHÍCULO
-    # ====================================================================
+
+def _fig_02_routes_by_vehicle(out_fig, save_kw, arcs, node_ids, lonlat, n_centers, **_):
+    """Rutas por vehículo (02_routes_by_vehicle.png)."""
     fig, ax = plt.subplots(figsize=(14, 10))
     
     # Nodos base
-    ax.scatter(centers["lon"], centers["lat"], s=200, marker="s", 
+    c_xy, i_xy = lonlat[:n_centers], lonlat[n_centers:]
+    ax.scatter(c_xy[:, 0], c_xy[:, 1], s=200, marker="s", 
                color='red', label="CD", zorder=3, edgecolors='black', linewidth=2)
-    ax.scatter(clients["lon"], clients["lat"], s=60, marker="o", 
+    ax.scatter(i_xy[:, 0], i_xy[:, 1], s=60, marker="o", 
                color='lightgray', label="Clientes", zorder=1, alpha=0.5)
     
-    # Rutas por vehículo (cada vehículo con color diferente)
-    vehicles = arcs["vehicle"].unique()
+    # Rutas por vehículo (cada vehículo con color diferente): un
+    # LineCollection por vehículo con todos sus segmentos (from -> to)
+    veh_code, vehicles = pd.factorize(arcs["vehicle"])   # orden de aparición
     colors = plt.cm.tab10(range(len(vehicles)))
-    
+
+    # Posiciones de from/to en node_ids (-1 si el nodo no tiene coordenadas)
+    i_from = node_ids.get_indexer(arcs["from"])
+    i_to = node_ids.get_indexer(arcs["to"])
+    known = (i_from >= 0) & (i_to >= 0)
+    segs = np.stack([lonlat[i_from[known]], lonlat[i_to[known]]],
+                    axis=1)                            # (arcos, 2 puntos, lon/lat)
+
+    # Arcos agrupados por vehículo (orden estable) y cortes de cada grupo
+    code = veh_code[known]
+    order = np.argsort(code, kind="stable")
+    cuts = np.searchsorted(code[order], np.arange(len(vehicles) + 1))
+
     for idx, veh in enumerate(vehicles):
-        veh_arcs = arcs[arcs["vehicle"] == veh]
-        color = colors[idx]
-        
-        for _, r in veh_arcs.iterrows():
-            i, j = r["from"], r["to"]
-            if i in coord.index and j in coord.index:
-                x = [coord.loc[i, "lon"], coord.loc[j, "lon"]]
-                y = [coord.loc[i, "lat"], coord.loc[j, "lat"]]
-                ax.plot(x, y, linewidth=2, color=color, alpha=0.7, label=veh if _ == 0 else "")
+        rows = order[cuts[idx]:cuts[idx + 1]]
+        if len(rows):
+            ax.add_collection(LineCollection(segs[rows], linewidths=2, colors=[colors[idx]],
+                                             alpha=0.7, label=veh, zorder=2))
+    ax.autoscale_view()
     
     ax.set_xlabel("Longitud", fontsize=12)
     ax.set_ylabel("Latitud", fontsize=12)
@@ -106,13 +107,13 @@ def make_all_figures(data_dir: str):
     ax.legend(by_label.values(), by_label.keys(), fontsize=9, loc='best')
     ax.grid(True, alpha=0.3)
     
-    fig.savefig(out_fig / "02_routes_by_vehicle.png", bbox_inches="tight")
+    fig.savefig(out_fig / "02_routes_by_vehicle.png", **save_kw)
     plt.close(fig)
-    print("02_routes_by_vehicle.png")
+    return "02_routes_by_vehicle.png"
 
-    # ====================================================================
-    # FIGURA 3: COSTOS POR VEHÍCULO
-    # ====================================================================
+
+def _fig_03_costs_per_vehicle(out_fig, save_kw, vehicle_kpis, **_):
+    """Costos por vehículo (03_costs_per_vehicle.png)."""
     fig, ax = plt.subplots(figsize=(10, 6))
     
     # Filtrar vehículos activos
@@ -129,19 +130,19 @@ def make_all_figures(data_dir: str):
         ax.grid(True, alpha=0.3, axis='x')
         
         # Añadir valores
-        for idx, row in active_veh.iterrows():
-            ax.text(row["cost"], row["vehicle"], f' ${row["cost"]:,.0f}', 
+        for veh, cost in zip(active_veh["vehicle"].to_numpy(), active_veh["cost"].to_numpy()):
+            ax.text(cost, veh, f' ${cost:,.0f}', 
                     va='center', fontsize=9)
     else:
         ax.text(0.5, 0.5, 'No hay vehículos activos', ha='center', va='center')
     
-    fig.savefig(out_fig / "03_costs_per_vehicle.png", bbox_inches="tight")
+    fig.savefig(out_fig / "03_costs_per_vehicle.png", **save_kw)
     plt.close(fig)
-    print("03_costs_per_vehicle.png")
+    return "03_costs_per_vehicle.png"
 
-    # ====================================================================
-    # FIGURA 4: PARTICIPACIÓN DE SUMINISTRO POR CD
-    # ====================================================================
+
+def _fig_04_supply_share(out_fig, save_kw, center_kpis, **_):
+    """Participación de suministro por CD (04_supply_share.png)."""
     fig, ax = plt.subplots(figsize=(10, 6))
     
     total_supply = center_kpis["supply"].sum()
@@ -155,19 +156,19 @@ def make_all_figures(data_dir: str):
         ax.grid(True, alpha=0.3, axis='y')
         
         # Valores encima de barras
-        for idx, row in center_kpis.iterrows():
-            ax.text(row["center"], row["share"], f'{row["share"]:.1f}%', 
+        for cen, share in zip(center_kpis["center"].to_numpy(), center_kpis["share"].to_numpy()):
+            ax.text(cen, share, f'{share:.1f}%', 
                     ha='center', va='bottom', fontsize=10, fontweight='bold')
     else:
         ax.text(0.5, 0.5, 'No hay suministro registrado', ha='center', va='center')
     
-    fig.savefig(out_fig / "04_supply_share.png", bbox_inches="tight")
+    fig.savefig(out_fig / "04_supply_share.png", **save_kw)
     plt.close(fig)
-    print("04_supply_share.png")
+    return "04_supply_share.png"
 
-    # ====================================================================
-    # FIGURA 5: CLIENTES ATENDIDOS POR CD
-    # ====================================================================
+
+def _fig_05_assignment_by_center(out_fig, save_kw, centers, clients, arcs, **_):
+    """Clientes atendidos por CD (05_assignment_by_center.png)."""
     fig, ax = plt.subplots(figsize=(10, 6))
     
     CDs = set(centers["id"].tolist())
@@ -175,13 +176,11 @@ def make_all_figures(data_dir: str):
     
     if not arcs.empty:
         # Arcos desde CD hacia cliente
-        cd_to_client = arcs[
-            arcs["from"].isin(CDs) & arcs["to"].isin(clients_ids)
-        ].copy()
+        cd_to_client = arcs["from"].isin(CDs) & arcs["to"].isin(clients_ids)
         
-        if not cd_to_client.empty:
-            count = cd_to_client.groupby("from").size().reset_index(name="n_clients")
-            count.columns = ["center", "n_clients"]
+        if cd_to_client.any():
+            count = (arcs.loc[cd_to_client].groupby("from").size()
+                     .rename_axis("center").reset_index(name="n_clients"))
             
             ax.bar(count["center"], count["n_clients"], color='coral', edgecolor='black')
             ax.set_xlabel("Centro de Distribución", fontsize=12)
@@ -190,21 +189,21 @@ def make_all_figures(data_dir: str):
             ax.grid(True, alpha=0.3, axis='y')
             
             # Valores
-            for idx, row in count.iterrows():
-                ax.text(row["center"], row["n_clients"], str(int(row["n_clients"])), 
+            for cen, n in zip(count["center"].to_numpy(), count["n_clients"].to_numpy()):
+                ax.text(cen, n, str(int(n)), 
                         ha='center', va='bottom', fontsize=11, fontweight='bold')
         else:
             ax.text(0.5, 0.5, 'No hay asignaciones CD → Cliente', ha='center', va='center')
     else:
         ax.text(0.5, 0.5, 'No hay rutas disponibles', ha='center', va='center')
     
-    fig.savefig(out_fig / "05_assignment_by_center.png", bbox_inches="tight")
+    fig.savefig(out_fig / "05_assignment_by_center.png", **save_kw)
     plt.close(fig)
-    print("05_assignment_by_center.png")
+    return "05_assignment_by_center.png"
 
-    # ====================================================================
-    # FIGURA 6: FLUJO TOTAL POR ARCO
-    # ====================================================================
+
+def _fig_06_flow_by_arc_total(out_fig, save_kw, flows, **_):
+    """Flujo total por arco (06_flow_by_arc_total.png)."""
     fig, ax = plt.subplots(figsize=(12, 6))
     
     if not flows.empty:
@@ -221,13 +220,13 @@ def make_all_figures(data_dir: str):
     else:
         ax.text(0.5, 0.5, 'No hay flujos registrados', ha='center', va='center')
     
-    fig.savefig(out_fig / "06_flow_by_arc_total.png", bbox_inches="tight")
+    fig.savefig(out_fig / "06_flow_by_arc_total.png", **save_kw)
     plt.close(fig)
-    print("06_flow_by_arc_total.png")
+    return "06_flow_by_arc_total.png"
 
-    # ====================================================================
-    # FIGURA 7: FLUJO POR VEHÍCULO
-    # ====================================================================
+
+def _fig_07_flow_by_arc_per_vehicle(out_fig, save_kw, flows, **_):
+    """Flujo por vehículo (07_flow_by_arc_per_vehicle.png)."""
     fig, ax = plt.subplots(figsize=(10, 6))
     
     if not flows.empty:
@@ -241,19 +240,19 @@ def make_all_figures(data_dir: str):
         ax.grid(True, alpha=0.3, axis='y')
         
         # Valores
-        for idx, row in flows_k.iterrows():
-            ax.text(row["vehicle"], row["flow"], f'{row["flow"]:.0f}', 
+        for veh, flow in zip(flows_k["vehicle"].to_numpy(), flows_k["flow"].to_numpy()):
+            ax.text(veh, flow, f'{flow:.0f}', 
                     ha='center', va='bottom', fontsize=9, fontweight='bold')
     else:
         ax.text(0.5, 0.5, 'No hay flujos por vehículo', ha='center', va='center')
     
-    fig.savefig(out_fig / "07_flow_by_arc_per_vehicle.png", bbox_inches="tight")
+    fig.savefig(out_fig / "07_flow_by_arc_per_vehicle.png", **save_kw)
     plt.close(fig)
-    print("07_flow_by_arc_per_vehicle.png")
+    return "07_flow_by_arc_per_vehicle.png"
 
-    # ====================================================================
-    # FIGURA 8: UTILIZACIÓN DE CAPACIDAD POR CD
-    # ====================================================================
+
+def _fig_08_center_capacity_util(out_fig, save_kw, center_kpis, **_):
+    """Utilización de capacidad por CD (08_center_capacity_util.png)."""
     fig, ax = plt.subplots(figsize=(10, 6))
     
     center_kpis["util_pct"] = (center_kpis["utilization"] * 100).clip(lower=0, upper=100)
@@ -270,17 +269,17 @@ def make_all_figures(data_dir: str):
     ax.grid(True, alpha=0.3, axis='y')
     
     # Valores
-    for idx, row in center_kpis.iterrows():
-        ax.text(row["center"], row["util_pct"], f'{row["util_pct"]:.1f}%', 
+    for cen, util in zip(center_kpis["center"].to_numpy(), center_kpis["util_pct"].to_numpy()):
+        ax.text(cen, util, f'{util:.1f}%', 
                 ha='center', va='bottom', fontsize=10, fontweight='bold')
     
-    fig.savefig(out_fig / "08_center_capacity_util.png", bbox_inches="tight")
+    fig.savefig(out_fig / "08_center_capacity_util.png", **save_kw)
     plt.close(fig)
-    print("08_center_capacity_util.png")
+    return "08_center_capacity_util.png"
 
-    # ====================================================================
-    # FIGURA 9: DESGLOSE DE COSTOS (PIE CHART)
-    # ====================================================================
+
+def _fig_09_cost_breakdown_pie(out_fig, save_kw, arcs, **_):
+    """Desglose de costos en torta (09_cost_breakdown_pie.png)."""
     fig, ax = plt.subplots(figsize=(10, 8))
     
     if all(col in arcs.columns for col in ["fuel_cost", "dist_cost", "time_cost"]):
@@ -304,18 +303,20 @@ def make_all_figures(data_dir: str):
     else:
         ax.text(0.5, 0.5, 'Componentes de costo no disponibles', ha='center', va='center')
     
-    fig.savefig(out_fig / "09_cost_breakdown_pie.png", bbox_inches="tight")
+    fig.savefig(out_fig / "09_cost_breakdown_pie.png", **save_kw)
     plt.close(fig)
-    print("09_cost_breakdown_pie.png")
+    return "09_cost_breakdown_pie.png"
 
-    # ====================================================================
-    # FIGURA 10: UTILIZACIÓN DE CARGA POR VEHÍCULO
-    # ====================================================================
+
+def _fig_10_vehicle_load_util(out_fig, save_kw, vehicle_kpis, **_):
+    """Utilización de carga por vehículo (10_vehicle_load_util.png)."""
     fig, ax = plt.subplots(figsize=(10, 6))
     
-    vehicle_kpis["load_util"] = (
-        vehicle_kpis["load_delivered"] / vehicle_kpis["capacity"]
-    ).replace([float('inf')], 0).fillna(0) * 100
+    # Carga / capacidad en %, 0 si la capacidad es 0 o falta
+    load = vehicle_kpis["load_delivered"].to_numpy(dtype=float)
+    cap = vehicle_kpis["capacity"].to_numpy(dtype=float)
+    vehicle_kpis["load_util"] = np.divide(load, cap, out=np.zeros_like(load),
+                                          where=cap > 0) * 100
     
     active_load = vehicle_kpis[vehicle_kpis["load_util"] > 0].sort_values("load_util", ascending=False)
     
@@ -332,19 +333,19 @@ def make_all_figures(data_dir: str):
         ax.grid(True, alpha=0.3, axis='x')
         
         # Valores
-        for idx, row in active_load.iterrows():
-            ax.text(row["load_util"], row["vehicle"], f' {row["load_util"]:.1f}%', 
+        for veh, util in zip(active_load["vehicle"].to_numpy(), active_load["load_util"].to_numpy()):
+            ax.text(util, veh, f' {util:.1f}%', 
                     va='center', fontsize=9)
     else:
         ax.text(0.5, 0.5, 'No hay vehículos con carga', ha='center', va='center')
     
-    fig.savefig(out_fig / "10_vehicle_load_util.png", bbox_inches="tight")
+    fig.savefig(out_fig / "10_vehicle_load_util.png", **save_kw)
     plt.close(fig)
-    print("10_vehicle_load_util.png")
+    return "10_vehicle_load_util.png"
 
-    # ====================================================================
-    # FIGURA 11: DISTANCIA VS COSTO POR VEHÍCULO
-    # ====================================================================
+
+def _fig_11_distance_vs_cost(out_fig, save_kw, vehicle_kpis, **_):
+    """Distancia vs costo por vehículo (11_distance_vs_cost.png)."""
     fig, ax = plt.subplots(figsize=(10, 6))
     
     active_dist = vehicle_kpis[vehicle_kpis["distance_km"] > 0]
@@ -354,9 +355,11 @@ def make_all_figures(data_dir: str):
                    s=100, alpha=0.6, edgecolors='black', linewidth=1.5)
         
         # Etiquetas de vehículos
-        for idx, row in active_dist.iterrows():
-            ax.annotate(row["vehicle"], 
-                        (row["distance_km"], row["cost"]),
+        for veh, dist, cost in zip(active_dist["vehicle"].to_numpy(),
+                                   active_dist["distance_km"].to_numpy(),
+                                   active_dist["cost"].to_numpy()):
+            ax.annotate(veh, 
+                        (dist, cost),
                         textcoords="offset points", xytext=(5, 5), fontsize=9)
         
         ax.set_xlabel("Distancia Total (km)", fontsize=12)
@@ -366,11 +369,133 @@ def make_all_figures(data_dir: str):
     else:
         ax.text(0.5, 0.5, 'No hay datos de distancia', ha='center', va='center')
     
-    fig.savefig(out_fig / "11_distance_vs_cost.png", bbox_inches="tight")
+    fig.savefig(out_fig / "11_distance_vs_cost.png", **save_kw)
     plt.close(fig)
-    print("11_distance_vs_cost.png")
+    return "11_distance_vs_cost.png"
+
+
+_FIGURES = (
+    ("01_nodes.png", _fig_01_nodes),
+    ("02_routes_by_vehicle.png", _fig_02_routes_by_vehicle),
+    ("03_costs_per_vehicle.png", _fig_03_costs_per_vehicle),
+    ("04_supply_share.png", _fig_04_supply_share),
+    ("05_assignment_by_center.png", _fig_05_assignment_by_center),
+    ("06_flow_by_arc_total.png", _fig_06_flow_by_arc_total),
+    ("07_flow_by_arc_per_vehicle.png", _fig_07_flow_by_arc_per_vehicle),
+    ("08_center_capacity_util.png", _fig_08_center_capacity_util),
+    ("09_cost_breakdown_pie.png", _fig_09_cost_breakdown_pie),
+    ("10_vehicle_load_util.png", _fig_10_vehicle_load_util),
+    ("11_distance_vs_cost.png", _fig_11_distance_vs_cost),
+)
+
+_CTX = None   # tablas de make_all_figures dentro de cada worker
+
+
+def _init_worker(ctx):
+    global _CTX
+    _CTX = ctx
+
+
+def _render(i):
+    return _FIGURES[i][1](**_CTX)
+
+
+def make_all_figures(data_dir: str, dpi=None, compress_level=None, workers=None,
+                     force=False):
+    """
+    Genera todas las figuras de análisis para un caso específico.
+    
+    Args:
+        data_dir: Ruta al directorio raíz del proyecto
+        dpi: resolución de los PNG (None = rcParams, 300); p. ej. 120 para CI
+        compress_level: nivel zlib del PNG (0-9; None = variable de entorno
+            FIGURES_COMPRESS_LEVEL, o 6 como Pillow). En CI conviene 1: sin
+            pérdida y mucho más rápido, pero PNG bastante más grandes
+        workers: procesos para renderizar las figuras en paralelo
+            (None = os.cpu_count(); 1 = en serie, en este proceso)
+        force: regenerar todas las figuras aunque los PNG estén al día
+    """
+    if compress_level is None:
+        compress_level = int(os.environ.get("FIGURES_COMPRESS_LEVEL", 6))
+    data_dir = Path(data_dir)
+    out_fig = data_dir / "outputs" / "figures"
+    out_fig.mkdir(parents=True, exist_ok=True)
+
+    tables = data_dir / "outputs" / "tables"
+    sources = [
+        data_dir / "inputs" / "nodes_centers.csv",
+        data_dir / "inputs" / "nodes_clients.csv",
+        tables / "selected_arcs_detailed.csv",
+        tables / "flows_by_arc_per_vehicle.csv",
+        tables / "center_kpis.csv",
+        tables / "vehicle_kpis.csv",
+        Path(__file__),          # cambios en el código de las figuras
+    ]
+
+    # dpi/compress_level con que se generaron los PNG actuales (sidecar); sin
+    # sidecar se asumen los valores por defecto. Si cambian, todo está viejo
+    settings = {"dpi": dpi, "compress_level": compress_level}
+    sidecar = out_fig / "render_settings.json"
+    prev = (json.loads(sidecar.read_text()) if sidecar.exists()
+            else {"dpi": None, "compress_level": 6})
+    force = force or prev != settings
+
+    # Sólo se regeneran los PNG que falten o sean más viejos que sus fuentes
+    src_mtime = max(p.stat().st_mtime for p in sources)
+    todo = [i for i, (png, _) in enumerate(_FIGURES)
+            if force or not (out_fig / png).exists()
+            or (out_fig / png).stat().st_mtime <= src_mtime]
+    if not todo:
+        print(f" Figuras al día en: {out_fig} (sin cambios en las tablas)")
+        return
+
+    # ====================================================================
+    # LECTURA DE DATOS (RUTAS CORREGIDAS)
+    # ====================================================================
+    
+    # Leer desde inputs/ (datos preprocesados)
+    centers = _read_csv(sources[0])
+    clients = _read_csv(sources[1])
+    
+    # Leer desde outputs/tables/ (resultados del solver)
+    arcs = _read_csv(sources[2])
+    flows = _read_csv(sources[3])
+    center_kpis = _read_csv(sources[4])
+    vehicle_kpis = _read_csv(sources[5])
+
+    # Coordenadas de todos los nodos (primero los n_centers CDs, luego clientes)
+    n_centers = len(centers)
+    node_ids = pd.Index(np.concatenate([centers["id"].to_numpy(), clients["id"].to_numpy()]))
+    lonlat = np.concatenate([centers[["lon", "lat"]].to_numpy(dtype=float),
+                             clients[["lon", "lat"]].to_numpy(dtype=float)])
+
+    save_kw = {"bbox_inches": "tight", "pil_kwargs": {"compress_level": compress_level}}
+    if dpi is not None:
+        save_kw["dpi"] = dpi
+
+    print(f" Generando figuras en: {out_fig}")
+
+    ctx = dict(out_fig=out_fig, save_kw=save_kw, centers=centers, clients=clients,
+               arcs=arcs, flows=flows, center_kpis=center_kpis,
+               vehicle_kpis=vehicle_kpis, node_ids=node_ids, lonlat=lonlat,
+               n_centers=n_centers)
+
+    # Las figuras son independientes entre sí: se reparten en procesos (Agg no
+    # es thread-safe); las tablas viajan una sola vez por worker (initializer)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(todo))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(ctx,)) as ex:
+            names = list(ex.map(_render, todo))
+    else:
+        names = [_FIGURES[i][1](**ctx) for i in todo]
+    for name in names:
+        print(name)
+    sidecar.write_text(json.dumps(settings))
 
-    print(f"\n {11} figuras generadas exitosamente en: {out_fig}\n")
+    print(f"\n {len(names)} figuras generadas exitosamente en: {out_fig}\n")
 
 
 if __name__ == "__main__":
@@ -1,11 +1,30 @@
 
 # -*- coding: utf-8 -*-
+import os
 from pathlib import Path
 import pandas as pd
 from pyomo.environ import SolverFactory, value
-from model.build_model import build_model
+from model.build_model import build_model, _read_first_existing, _parquet_first
 
-def solve_and_export(data_dir:str):
+# Opciones por defecto para HiGHS: IPM sin crossover, paralelo y gap relativo
+# de 0.1% (solución casi óptima, termina antes en instancias grandes)
+HIGHS_OPTIONS = {
+    "solver": "ipm",
+    "run_crossover": "off",
+    "primal_feasibility_tolerance": 1e-5,
+    "parallel": "on",
+    "threads": os.cpu_count() or 1,
+    "mip_rel_gap": 1e-3,
+}
+
+def solve_and_export(data_dir:str, solver_options=None):
+    """
+    Resuelve el MILP y exporta las tablas espejo a outputs/tables.
+
+    solver_options: dict de opciones que se pasan tal cual al solver elegido.
+    Si es None y el solver es HiGHS se usan HIGHS_OPTIONS; para CBC/GLPK no
+    se pasa nada.
+    """
     data_dir = Path(data_dir)
     out_tables = data_dir/"outputs/tables"
     out_tables.mkdir(parents=True, exist_ok=True)
@@ -17,26 +36,29 @@ def solve_and_export(data_dir:str):
         try:
             if SolverFactory(s).available(exception_flag=False):
                 solver = SolverFactory(s)
+                solver_name = s
                 break
         except Exception:
             pass
     if solver is None:
         raise RuntimeError("No solver available (instala HiGHS/CB C/GLPK).")
 
+    if solver_options is None:
+        solver_options = HIGHS_OPTIONS if solver_name == "highs" else {}
+    solver.options.update(solver_options)
+
     res = solver.solve(m, tee=False)
     term = str(getattr(res.solver, "termination_condition", ""))
     if "optimal" not in term.lower():
         raise RuntimeError(f"Solver terminó con: {term}")
 
     # Exportar arcos seleccionados
-    arcs_cache = pd.read_csv(out_tables/"arcs_cache.csv")
-    sel = []
-    for k in m.K:
-        for (i,j) in m.A:
-            xv = m.x[k,i,j].value
-            if xv is not None and xv > 0.5:
-                sel.append({"vehicle":k,"from":i,"to":j})
-    sel_df = pd.DataFrame(sel)
+    # Parquet de preprocess si está al día (columnar, tipos conservados), si no CSV
+    arcs_cache = _read_first_existing(_parquet_first(out_tables/"arcs_cache.csv"))
+    x_vals = m.x.get_values()
+    y_vals = m.y.get_values()
+    sel_df = pd.DataFrame([t for t, v in x_vals.items() if v is not None and v > 0.5],
+                          columns=["vehicle","from","to"])
     if sel_df.empty:
         # Generar CSVs vacíos con columnas esperadas
         sel_df = pd.DataFrame(columns=["vehicle","from","to","dist_km","time_h","cost"])
@@ -44,40 +66,35 @@ def solve_and_export(data_dir:str):
         sel_df = sel_df.merge(arcs_cache, on=["vehicle","from","to"], how="left", validate="m:1")
     sel_df.to_csv(out_tables/"selected_arcs_detailed.csv", index=False)
 
-    # Flujos por arco y vehículo
-    flows = []
-    for k in m.K:
-        for (i,j) in m.A:
-            yv = m.y[k,i,j].value
-            yv = float(yv) if yv is not None else 0.0
-            if yv > 1e-6:
-                flows.append({"vehicle":k,"from":i,"to":j,"flow":yv})
-    pd.DataFrame(flows).to_csv(out_tables/"flows_by_arc_per_vehicle.csv", index=False)
+    # Flujos por arco y vehículo (valores de y en una tabla; None -> NaN)
+    y_df = pd.DataFrame(list(y_vals.keys()), columns=["vehicle","from","to"])
+    y_df["flow"] = pd.to_numeric(pd.Series(list(y_vals.values()), dtype=object), errors="coerce") \
+        .astype(float).to_numpy()
+    y_df[y_df["flow"] > 1e-6].to_csv(out_tables/"flows_by_arc_per_vehicle.csv", index=False)
 
     # KPIs centros
     centers = pd.read_csv(data_dir/"data/raw/nodes_centers.csv").set_index("id")
     center_kpis = []
+    s_vals = m.s.get_values()
     for c in m.C:
-        s_val = float(m.s[c].value) if m.s[c].value is not None else 0.0
+        s_val = float(s_vals[c]) if s_vals[c] is not None else 0.0
         cap = float(centers.loc[c,"cap"]) if c in centers.index else float("nan")
         util = (s_val/cap) if cap>0 else float("nan")
         center_kpis.append({"center":c,"supply":s_val,"cap":cap,"utilization":util})
     pd.DataFrame(center_kpis).to_csv(out_tables/"center_kpis.csv", index=False)
 
+    # Carga entregada a clientes (entradas a clientes) por vehículo
+    load_by_veh = y_df[y_df["to"].isin(set(m.I))].groupby("vehicle")["flow"].sum().to_dict()
+
     # KPIs vehículos
     vehicles = pd.read_csv(data_dir/"data/params/vehicles.csv").set_index("id")
+    veh_tot = (
+        sel_df.groupby("vehicle")[["dist_km","time_h","cost"]].sum()
+        .reindex(list(m.K), fill_value=0.0).astype(float)
+    )
     veh_kpis = []
-    for k in m.K:
-        sub = sel_df[sel_df["vehicle"]==k]
-        dist = float(sub["dist_km"].sum()) if not sub.empty else 0.0
-        time = float(sub["time_h"].sum()) if not sub.empty else 0.0
-        cost = float(sub["cost"].sum()) if not sub.empty else 0.0
-        # carga entregada a clientes (entradas a clientes)
-        load = 0.0
-        for (i,j) in m.A:
-            if j in m.I:
-                v = m.y[k,i,j].value
-                load += float(v) if v is not None else 0.0
+    for k, dist, time, cost in veh_tot.itertuples():
+        load = load_by_veh.get(k, 0.0)
         cap = float(vehicles.loc[k,"Q"]) if k in vehicles.index else float("nan")
         veh_kpis.append({
             "vehicle":k, "distance_km":dist, "time_h":time, "cost":cost,
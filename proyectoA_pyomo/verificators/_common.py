@@ -0,0 +1,51 @@
+import functools
+from pathlib import Path
+
+import pandas as pd
+
+# Carpeta raíz del proyecto (un nivel por encima de 'verificators')
+DATA_DIR = Path(__file__).resolve().parents[1]
+
+_FILES = (
+    ("inputs", "nodes_clients.csv"),
+    ("inputs", "nodes_centers.csv"),
+    ("inputs", "vehicles.csv"),
+    ("outputs/tables", "selected_arcs_detailed.csv"),
+    ("outputs/tables", "vehicle_kpis.csv"),
+)
+
+
+@functools.lru_cache(maxsize=4)
+def _read_all(data_dir: str, mtimes: tuple):
+    """Lectura real; memoizada por (data_dir, mtimes): un CSV modificado se relee."""
+    paths = [Path(data_dir) / sub / name for sub, name in _FILES]
+
+    # Los ids se leen directamente como string (sin inferir ni convertir)
+    nodes_clients = pd.read_csv(paths[0], dtype={"id": str, "demand": float})
+    nodes_centers = pd.read_csv(paths[1], dtype={"id": str})
+    vehicles = pd.read_csv(paths[2], dtype={"id": str})
+
+    arcs = pd.read_csv(paths[3],
+                       dtype={"vehicle": str, "from": str, "to": str,
+                              "dist_km": float, "time_h": float, "cost": float})
+    veh_kpis = pd.read_csv(paths[4], dtype={"vehicle": str})
+
+    return nodes_clients, nodes_centers, vehicles, arcs, veh_kpis
+
+
+def load_common(data_dir=DATA_DIR):
+    """
+    Carga los insumos que comparten los verificadores:
+    - inputs/nodes_clients.csv
+    - inputs/nodes_centers.csv
+    - inputs/vehicles.csv
+    - outputs/tables/selected_arcs_detailed.csv
+    - outputs/tables/vehicle_kpis.csv
+
+    Devuelve (nodes_clients, nodes_centers, vehicles, arcs, veh_kpis). Se leen
+    una sola vez por proceso mientras no cambien en disco; los verificadores
+    no deben modificar estos DataFrames.
+    """
+    data_dir = Path(data_dir)
+    mtimes = tuple((data_dir / sub / name).stat().st_mtime for sub, name in _FILES)
+    return _read_all(str(data_dir), mtimes)
@@ -1,50 +1,63 @@
 from pathlib import Path
+import numpy as np
 import pandas as pd
 
+try:
+    from verificators._common import load_common
+except ImportError:  # ejecutado como script: python verificators/<archivo>.py
+    from _common import load_common
+
 # Carpeta raíz del proyecto (un nivel por encima de 'verificators')
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 
-# Directorios de entrada y tablas
-INPUTS_DIR = PROJECT_ROOT / "inputs"
-TABLES_DIR = PROJECT_ROOT / "outputs" / "tables"
-
 # Directorio y path de verificación
 VERIF_DIR = PROJECT_ROOT / "verificators" / "outputs"
 VERIF_PATH = VERIF_DIR / "verificacion_caso1.csv"
 
 
-def build_verificacion():
-    # --- Leer datos de entrada ya preprocesados ---
-    nodes_clients = pd.read_csv(INPUTS_DIR / "nodes_clients.csv")
-    nodes_centers = pd.read_csv(INPUTS_DIR / "nodes_centers.csv")
-    vehicles = pd.read_csv(INPUTS_DIR / "vehicles.csv")
-
-    sel = pd.read_csv(TABLES_DIR / "selected_arcs_detailed.csv")
+def build_verificacion(data=None):
+    # --- Datos de entrada ya preprocesados (compartidos con los otros casos) ---
+    nodes_clients, nodes_centers, vehicles, sel, _ = (
+        data if data is not None else load_common(PROJECT_ROOT)
+    )
 
     # Mapas útiles
-    demand_map = nodes_clients.set_index("id")["demand"].to_dict()
-    center_ids = set(nodes_centers["id"].unique())
-    veh_cap = vehicles.set_index("id")["Q"].to_dict()
+    demand_map = dict(zip(nodes_clients["id"].tolist(),
+                          nodes_clients["demand"].to_numpy(dtype=float).tolist()))
+    center_ids = frozenset(nodes_centers["id"].tolist())
+    veh_cap = dict(zip(vehicles["id"], vehicles["Q"]))
 
     # Asegurarnos de que tenemos dist_km, time_h, cost en sel_df
     for col in ["dist_km", "time_h", "cost"]:
         if col not in sel.columns:
             raise ValueError(f"Falta la columna '{col}' en selected_arcs_detailed.csv")
 
-    rows = []
+    # Columnas en el orden que pide el enunciado; se acumulan por columna
+    # (una lista por campo) y el DataFrame se arma una sola vez al final
+    cols_order = [
+        "VehicleId",
+        "DepotId",
+        "InitialLoad",
+        "RouteSequence",
+        "ClientsServed",
+        "DemandsSatisfied",
+        "TotalDistance",
+        "TotalTime",
+        "FuelCost",
+    ]
+    cols = {c: [] for c in cols_order}
+
+    # Distancia / tiempo / costo totales por vehículo (una sola agregación)
+    totals = sel.groupby("vehicle")[["dist_km", "time_h", "cost"]].sum()
+    totals_by_veh = dict(zip(totals.index, totals.to_numpy().tolist()))
 
     # --- Reconstruir una ruta por vehículo ---
-    for veh_id in sorted(sel["vehicle"].unique()):
-        arcs_v = sel[sel["vehicle"] == veh_id].copy()
-        if arcs_v.empty:
-            continue  # vehículo no usado
+    for veh_id, arcs_v in sel.groupby("vehicle", sort=True):
 
         # Construir mapa i -> j (suponiendo una sola salida por nodo)
-        next_map = {}
-        for _, r in arcs_v.iterrows():
-            i = r["from"]
-            j = r["to"]
-            next_map[i] = j
+        frm = arcs_v["from"].to_numpy()
+        to = arcs_v["to"].to_numpy()
+        next_map = dict(zip(frm, to))
 
         # Determinar el centro (depot) para esta ruta
         depot_candidates = [n for n in next_map.keys() if n in center_ids]
@@ -76,55 +89,40 @@ def build_verificacion():
         client_ids = [n for n in seq if n in demand_map]
 
         # Demandas servidas por ese vehículo
-        demands = [float(demand_map[c]) for c in client_ids]
-        total_demand_served = sum(demands)
+        demands = np.fromiter((demand_map[c] for c in client_ids), dtype=float,
+                              count=len(client_ids))
+        total_demand_served = float(demands.sum())
 
         # Distancia / tiempo / costo totales del vehículo
-        total_dist = arcs_v["dist_km"].sum()
-        total_time_min = arcs_v["time_h"].sum() * 60.0  # <-- tiempo en minutos
-        total_cost = arcs_v["cost"].sum()  # aquí asumes que 'cost' = FuelCost en el caso base
+        total_dist, total_time_h, total_cost = (
+            totals_by_veh[veh_id]
+        )  # aquí asumes que 'cost' = FuelCost en el caso base
+        total_time_min = total_time_h * 60.0  # <-- tiempo en minutos
 
         # Carga inicial: usamos la carga realmente servida
-        initial_load = float(total_demand_served)
+        initial_load = total_demand_served
 
         # Construir campos tipo string
         route_seq_str = "-".join(seq) if seq else ""
-        demands_str = "-".join(
-            str(int(d)) if float(d).is_integer() else str(d)
-            for d in demands
-        )
+        demands_int = demands.astype(np.int64)
+        demands_str = "-".join(np.where(
+            demands == demands_int, demands_int.astype(str), demands.astype(str)
+        ).tolist())
 
         # Número de clientes atendidos
         clients_served = len(client_ids)
 
-        row = {
-            "VehicleId": veh_id,
-            "DepotId": depot,
-            "InitialLoad": initial_load,
-            "RouteSequence": route_seq_str,
-            "ClientsServed": clients_served,        # <-- ahora es un entero
-            "DemandsSatisfied": demands_str,
-            "TotalDistance": total_dist,
-            "TotalTime": total_time_min,            # <-- en minutos
-            "FuelCost": total_cost,
-        }
-        rows.append(row)
-
-    verif_df = pd.DataFrame(rows)
-
-    # Ordenar columnas en el orden que pide el enunciado
-    cols_order = [
-        "VehicleId",
-        "DepotId",
-        "InitialLoad",
-        "RouteSequence",
-        "ClientsServed",
-        "DemandsSatisfied",
-        "TotalDistance",
-        "TotalTime",
-        "FuelCost",
-    ]
-    verif_df = verif_df[cols_order]
+        cols["VehicleId"].append(veh_id)
+        cols["DepotId"].append(depot)
+        cols["InitialLoad"].append(initial_load)
+        cols["RouteSequence"].append(route_seq_str)
+        cols["ClientsServed"].append(clients_served)    # <-- ahora es un entero
+        cols["DemandsSatisfied"].append(demands_str)
+        cols["TotalDistance"].append(total_dist)
+        cols["TotalTime"].append(total_time_min)        # <-- en minutos
+        cols["FuelCost"].append(total_cost)
+
+    verif_df = pd.DataFrame(cols)
 
     verif_df.to_csv(VERIF_PATH, index=False)
     print(f"Archivo generado: {VERIF_PATH}")
@@ -1,69 +1,32 @@
+import numpy as np
 import pandas as pd
 from pathlib import Path
 
+try:
+    from verificators._common import load_common
+except ImportError:  # ejecutado como script: python verificators/<archivo>.py
+    from _common import load_common
+
 # Carpeta raíz del proyecto (la misma lógica que en solve.py)
 DATA_DIR = Path(__file__).resolve().parents[1]
 
 
-def _load_inputs_and_outputs():
-    """
-    Carga los insumos necesarios:
-    - inputs/nodes_clients.csv
-    - inputs/nodes_centers.csv
-    - inputs/vehicles.csv
-    - outputs/tables/selected_arcs_detailed.csv
-    - outputs/tables/vehicle_kpis.csv
-    """
-    inputs_dir = DATA_DIR / "inputs"
-    tables_dir = DATA_DIR / "outputs" / "tables"
-
-    nodes_clients = pd.read_csv(inputs_dir / "nodes_clients.csv")
-    nodes_centers = pd.read_csv(inputs_dir / "nodes_centers.csv")
-    vehicles = pd.read_csv(inputs_dir / "vehicles.csv")
-
-    arcs = pd.read_csv(tables_dir / "selected_arcs_detailed.csv")
-    veh_kpis = pd.read_csv(tables_dir / "vehicle_kpis.csv")
-
-    # Normalizar tipos de id a string
-    nodes_clients["id"] = nodes_clients["id"].astype(str)
-    nodes_centers["id"] = nodes_centers["id"].astype(str)
-    vehicles["id"] = vehicles["id"].astype(str)
-
-    arcs["vehicle"] = arcs["vehicle"].astype(str)
-    arcs["from"] = arcs["from"].astype(str)
-    arcs["to"] = arcs["to"].astype(str)
-
-    veh_kpis["vehicle"] = veh_kpis["vehicle"].astype(str)
-
-    return nodes_clients, nodes_centers, vehicles, arcs, veh_kpis
-
-
-def _hhmm_from_hours(h):
-    """
-    Convierte una cantidad de horas (float) a cadena "HH:MM".
-    Ej: 8.5 -> "08:30"
-    """
-    total_minutes = int(round(float(h) * 60))
-    hh = (total_minutes // 60) % 24
-    mm = total_minutes % 60
-    return f"{hh:02d}:{mm:02d}"
-
-
-def build_verification_case2(start_hour=8.0):
+def build_verification_case2(data=None):
     """
     Construye el archivo verificacion_caso2.csv siguiendo el formato del enunciado.
 
     Columnas:
     - VehicleId
-    - VehicleType
+    - DepotId
     - InitialLoad
     - RouteSequence
     - ClientsServed
-    - DemandSatisfied
-    - ArrivalTimes
+    - DemandsSatisfied
     - TotalDistance
     - TotalTime
-    - Cost
+    - FuelCost
+
+    `data` permite pasar las tablas ya leídas (ver _common.load_common).
     """
     (
         nodes_clients,
@@ -71,45 +34,42 @@ def build_verification_case2(start_hour=8.0):
         vehicles,
         arcs,
         veh_kpis,
-    ) = _load_inputs_and_outputs()
+    ) = data if data is not None else load_common(DATA_DIR)
 
-    client_ids = set(nodes_clients["id"])
-    center_ids = set(nodes_centers["id"])
+    client_ids = frozenset(nodes_clients["id"].tolist())
+    center_ids = frozenset(nodes_centers["id"].tolist())
 
     # Diccionarios auxiliares
-    demand_map = nodes_clients.set_index("id")["demand"].to_dict()
-
-    if "type" in vehicles.columns:
-        veh_type_map = vehicles.set_index("id")["type"].to_dict()
-    elif "VehicleType" in vehicles.columns:
-        veh_type_map = vehicles.set_index("id")["VehicleType"].to_dict()
-    else:
-        # Fallback genérico
-        veh_type_map = {row["id"]: "vehicle" for _, row in vehicles.iterrows()}
-
-    veh_kpis_idx = veh_kpis.set_index("vehicle")
-
-    # Para lookup rápido de tiempos por arco (para cada vehículo)
-    # Vamos a agrupar por vehículo y construir diccionarios (from, to) -> time_h
-    time_maps = {}
-    for k, sub in arcs.groupby("vehicle"):
-        time_maps[k] = {
-            (row["from"], row["to"]): float(row["time_h"])
-            for _, row in sub.iterrows()
-        }
-
-    rows = []
+    demand_map = dict(zip(nodes_clients["id"].tolist(),
+                          nodes_clients["demand"].to_numpy(dtype=float).tolist()))
+
+    # KPIs por vehículo: vehicle -> (distance_km, time_h, cost)
+    kpi_by_veh = dict(zip(
+        veh_kpis["vehicle"].tolist(),
+        veh_kpis[["distance_km", "time_h", "cost"]].to_numpy(dtype=float).tolist(),
+    ))
+
+    # Columnas de salida; se acumulan por columna (una lista por campo) y el
+    # DataFrame se arma una sola vez al final
+    cols = {c: [] for c in [
+        "VehicleId",
+        "DepotId",
+        "InitialLoad",
+        "RouteSequence",
+        "ClientsServed",
+        "DemandsSatisfied",
+        "TotalDistance",
+        "TotalTime",
+        "FuelCost",
+    ]}
 
     # Recorremos vehículos que tienen al menos un arco seleccionado
     for veh_id, veh_arcs in arcs.groupby("vehicle"):
         # Construir sucesores y predecesores para este vehículo
-        succ = {}
-        pred = {}
-        for _, r in veh_arcs.iterrows():
-            i = r["from"]
-            j = r["to"]
-            succ[i] = j
-            pred[j] = i
+        frm = veh_arcs["from"].to_numpy()
+        to = veh_arcs["to"].to_numpy()
+        succ = dict(zip(frm, to))
+        pred = dict(zip(to, frm))
 
         # Determinar centro de inicio:
         # buscamos un nodo centro que tenga arco saliendo y que no tenga predecesor.
@@ -153,33 +113,19 @@ def build_verification_case2(start_hour=8.0):
             continue
 
         # Demandas atendidas en orden
-        demands = [float(demand_map.get(c, 0.0)) for c in clients_seq]
-        demand_str = "-".join(
-            str(int(d)) if abs(d - int(d)) < 1e-6 else f"{d:.1f}"
-            for d in demands
-        )
-
-        # ArrivalTimes: acumulamos tiempos desde la hora de inicio
-        time_map = time_maps.get(veh_id, {})
-        arrival_times = []
-        t = float(start_hour)
-        current = seq[0]
-        for nxt in seq[1:]:
-            dt = float(time_map.get((current, nxt), 0.0))
-            t += dt
-            if nxt in client_ids:
-                arrival_times.append(_hhmm_from_hours(t))
-            current = nxt
-        arrival_str = "-".join(arrival_times)
-        
-        initial_load = sum(demands)
+        demands = np.fromiter((demand_map.get(c, 0.0) for c in clients_seq),
+                              dtype=float, count=len(clients_seq))
+        demands_int = demands.astype(np.int64)
+        demand_str = "-".join(np.where(
+            np.abs(demands - demands_int) < 1e-6,
+            demands_int.astype(str), np.char.mod("%.1f", demands),
+        ).tolist())
+
+        initial_load = sum(demands.tolist())
 
         # Totales de dist, tiempo, costo, carga
-        if veh_id in veh_kpis_idx.index:
-            row_kpi = veh_kpis_idx.loc[veh_id]
-            total_dist = float(row_kpi["distance_km"])
-            total_time = float(row_kpi["time_h"])
-            total_cost = float(row_kpi["cost"])
+        if veh_id in kpi_by_veh:
+            total_dist, total_time, total_cost = kpi_by_veh[veh_id]
         else:
             # Fallback
             used = veh_arcs
@@ -191,35 +137,17 @@ def build_verification_case2(start_hour=8.0):
         depot_id = start                    # centro de inicio
         total_time_min = total_time * 60.0  # minutos
 
-        rows.append(
-            {
-                "VehicleId": veh_id,
-                "DepotId": depot_id,
-                "InitialLoad": initial_load,
-                "RouteSequence": route_str,
-                "ClientsServed": len(clients_seq),
-                "DemandsSatisfied": demand_str,
-                "TotalDistance": total_dist,
-                "TotalTime": total_time_min,
-                "FuelCost": total_cost,  # usamos el costo total como FuelCost
-            }
-        )
-
-
-    verif_df = pd.DataFrame(rows)
-
-    cols = [
-        "VehicleId",
-        "DepotId",
-        "InitialLoad",
-        "RouteSequence",
-        "ClientsServed",
-        "DemandsSatisfied",
-        "TotalDistance",
-        "TotalTime",
-        "FuelCost",
-    ]
-    verif_df = verif_df[cols]
+        cols["VehicleId"].append(veh_id)
+        cols["DepotId"].append(depot_id)
+        cols["InitialLoad"].append(initial_load)
+        cols["RouteSequence"].append(route_str)
+        cols["ClientsServed"].append(len(clients_seq))
+        cols["DemandsSatisfied"].append(demand_str)
+        cols["TotalDistance"].append(total_dist)
+        cols["TotalTime"].append(total_time_min)
+        cols["FuelCost"].append(total_cost)  # usamos el costo total como FuelCost
+
+    verif_df = pd.DataFrame(cols)
 
     # Guardamos en outputs/verificacion_caso2.csv
     out_path = DATA_DIR / "verificators" / "outputs" / "verificacion_caso2.csv"